@@ -0,0 +1,234 @@
+import io
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+
+from core.mark_batch_attendance import mark_batch_attendance_s3
+
+# Background roll-call workers and how long finished jobs are kept (seconds)
+ATTENDANCE_JOB_WORKERS = int(os.getenv("ATTENDANCE_JOB_WORKERS", "2"))
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+# Queued + running jobs accepted at once (each holds its photos in memory)
+ATTENDANCE_MAX_PENDING_JOBS = int(os.getenv("ATTENDANCE_MAX_PENDING_JOBS", "16"))
+JOB_QUEUE_RETRY_AFTER_SECONDS = int(os.getenv("JOB_QUEUE_RETRY_AFTER_SECONDS", "30"))
+
+jobs_bp = Blueprint("attendance_jobs", __name__)
+
+_executor = ThreadPoolExecutor(max_workers=ATTENDANCE_JOB_WORKERS)
+_jobs = {}   # {job_id: job dict}, in-process only
+_job_events = {}   # {job_id: [(event name, payload)]} for the SSE stream
+_lock = threading.Lock()
+_events_changed = threading.Condition(_lock)
+
+
+class JobQueueFull(RuntimeError):
+    """Raised when ATTENDANCE_MAX_PENDING_JOBS jobs are already queued or running."""
+
+
+class UploadedImage(io.BytesIO):
+    """Group photo copied out of the request so a worker can read it later."""
+
+    def __init__(self, data, filename=""):
+        super().__init__(data)
+        self.filename = filename
+
+
+def _purge_expired_jobs():
+    now = time.time()
+    with _lock:
+        expired = [
+            job_id for job_id, job in _jobs.items()
+            if job["finishedAt"] and now - job["finishedAt"] > JOB_RETENTION_SECONDS
+        ]
+        for job_id in expired:
+            del _jobs[job_id]
+            _job_events.pop(job_id, None)
+
+
+def _pending_jobs():
+    # Called with the lock held
+    return sum(1 for job in _jobs.values() if job["finishedAt"] is None)
+
+
+def _update_job(job_id, event=None, **fields):
+    with _lock:
+        _jobs[job_id].update(fields)
+        if event:
+            _job_events[job_id].append(event)
+            _events_changed.notify_all()
+
+
+def _on_progress(job_id, event):
+    with _lock:
+        job = _jobs[job_id]
+        if event["event"] == "started":
+            job["progress"]["students"] = event["students"]
+            _job_events[job_id].append(("started", {"students": event["students"]}))
+        elif event["event"] == "compared":
+            job["progress"]["compared"] += 1
+        elif event["event"] == "present":
+            job["progress"]["matches"] += 1
+            _job_events[job_id].append(("present", event["student"]))
+        _events_changed.notify_all()
+
+
+def _run_job(job_id, kwargs):
+    _update_job(job_id, status="running", startedAt=time.time())
+    try:
+        present, absent, report_url = mark_batch_attendance_s3(
+            on_progress=lambda event: _on_progress(job_id, event), **kwargs
+        )
+        result = {"present": present, "absent": absent, "report_url": report_url}
+        _update_job(job_id, event=("done", result), status="done", finishedAt=time.time(), result=result)
+    except Exception as e:
+        print(f"❌ Attendance job {job_id} failed: {e}")
+        _update_job(
+            job_id, event=("error", {"error": str(e)}),
+            status="failed", finishedAt=time.time(), error=str(e)
+        )
+
+
+def submit_attendance_job(**kwargs):
+    """Queue a mark_batch_attendance_s3 run and return its job id (JobQueueFull at the cap)."""
+    _purge_expired_jobs()
+    job_id = uuid.uuid4().hex
+    with _lock:
+        if _pending_jobs() >= ATTENDANCE_MAX_PENDING_JOBS:
+            raise JobQueueFull(f"{ATTENDANCE_MAX_PENDING_JOBS} attendance jobs already pending")
+        _jobs[job_id] = {
+            "id": job_id,
+            "status": "queued",
+            "createdAt": time.time(),
+            "startedAt": None,
+            "finishedAt": None,
+            "progress": {"students": 0, "compared": 0, "matches": 0},
+            "result": None,
+            "error": None,
+        }
+        _job_events[job_id] = []
+    _executor.submit(_run_job, job_id, kwargs)
+    return job_id
+
+
+def get_job(job_id):
+    _purge_expired_jobs()
+    with _lock:
+        job = _jobs.get(job_id)
+        return {**job, "progress": dict(job["progress"])} if job else None
+
+
+def iter_job_events(job_id, heartbeat_seconds=15):
+    """
+    Yield (event name, payload) for a job as they happen, ending after the final
+    "done"/"error" event. Yields None when nothing happened for heartbeat_seconds.
+    """
+    sent = 0
+    while True:
+        with _events_changed:
+            _events_changed.wait_for(
+                lambda: job_id not in _jobs
+                or len(_job_events[job_id]) > sent
+                or _jobs[job_id]["finishedAt"] is not None,
+                timeout=heartbeat_seconds
+            )
+            if job_id not in _jobs:
+                return
+            pending = _job_events[job_id][sent:]
+            finished = _jobs[job_id]["finishedAt"] is not None
+
+        sent += len(pending)
+        for event in pending:
+            yield event
+        if finished and not pending:
+            return
+        if not pending:
+            yield None
+
+
+def _sse_response(job_id):
+    def stream():
+        yield f"event: job\ndata: {json.dumps({'job_id': job_id})}\n\n"
+        for event in iter_job_events(job_id):
+            if event is None:
+                yield ": keep-alive\n\n"
+            else:
+                name, payload = event
+                yield f"event: {name}\ndata: {json.dumps(payload)}\n\n"
+
+    return Response(
+        stream_with_context(stream()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _submit_from_request():
+    """Validate the take_attendance form and queue a job; returns (job_id, error response)."""
+    batch_name = request.form.get('batch_name')
+    subject_name = request.form.get('subject_name')
+    lab_name = request.form.get('lab_name', '')
+    mode = request.form.get('mode', 'compare')
+
+    group_images = request.files.getlist('class_images')
+    if not batch_name or not subject_name or not group_images:
+        return None, (jsonify({"success": False, "error": "Batch, Subject, and class_images are required"}), 400)
+
+    with _lock:
+        full = _pending_jobs() >= ATTENDANCE_MAX_PENDING_JOBS
+    try:
+        if full:
+            # Refuse before copying the photos out of the request
+            raise JobQueueFull(f"{ATTENDANCE_MAX_PENDING_JOBS} attendance jobs already pending")
+        job_id = submit_attendance_job(
+            batch_name=batch_name,
+            class_name=lab_name,
+            subject=subject_name,
+            group_image_files=[UploadedImage(f.read(), f.filename) for f in group_images],
+            mode=mode
+        )
+    except JobQueueFull as e:
+        response = jsonify({"success": False, "error": f"Attendance queue is full, try again shortly ({e})"})
+        return None, (response, 503, {"Retry-After": str(JOB_QUEUE_RETRY_AFTER_SECONDS)})
+    return job_id, None
+
+
+@jobs_bp.route("/take_attendance/jobs", methods=["POST"])
+def submit_take_attendance():
+    job_id, error = _submit_from_request()
+    if error:
+        return error
+    return jsonify({
+        "success": True,
+        "job_id": job_id,
+        "status_url": f"/take_attendance/jobs/{job_id}"
+    }), 202
+
+
+@jobs_bp.route("/take_attendance/jobs/<job_id>", methods=["GET"])
+def take_attendance_job_status(job_id):
+    job = get_job(job_id)
+    if not job:
+        return jsonify({"success": False, "error": "Job not found or expired"}), 404
+    return jsonify({"success": job["status"] != "failed", **job}), 200
+
+
+# Live roll call: each recognized student is pushed as a "present" event,
+# followed by a final "done" event with present/absent/report_url.
+@jobs_bp.route("/take_attendance/stream", methods=["POST"])
+def take_attendance_stream():
+    job_id, error = _submit_from_request()
+    if error:
+        return error
+    return _sse_response(job_id)
+
+
+# EventSource (GET) view of an already submitted job
+@jobs_bp.route("/take_attendance/jobs/<job_id>/events", methods=["GET"])
+def take_attendance_job_events(job_id):
+    if not get_job(job_id):
+        return jsonify({"success": False, "error": "Job not found or expired"}), 404
+    return _sse_response(job_id)
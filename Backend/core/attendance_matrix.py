@@ -0,0 +1,61 @@
+import numpy as np
+
+STATUS_LABELS = ("Absent", "Present")
+
+
+class AttendanceMatrix:
+    """
+    Presence of one batch/section: a row per session and a bit per student.
+    Rows are stored packed (np.packbits), so a semester of 200 sessions x 300
+    students takes ~7.5 KB; reductions unpack into a temporary bool matrix.
+    """
+
+    def __init__(self, students, sessions, session_ids=None):
+        """
+        students: roster names (duplicates collapse to one column)
+        sessions: one iterable of present names per session, in report order
+        session_ids: optional label per session (e.g. report keys); default 0..n-1
+        """
+        self.students = list(dict.fromkeys(students))
+        self.student_index = {name: i for i, name in enumerate(self.students)}
+
+        # Scatter (session, student) coordinates; names not on the roster are ignored
+        row_ids, col_ids = [], []
+        session_count = 0
+        for row, present in enumerate(sessions):
+            session_count += 1
+            cols = {self.student_index[name] for name in present if name in self.student_index}
+            row_ids.extend([row] * len(cols))
+            col_ids.extend(cols)
+
+        presence = np.zeros((session_count, len(self.students)), dtype=bool)
+        presence[row_ids, col_ids] = True
+        self.packed = np.packbits(presence, axis=1)
+        self.session_count = session_count
+        self.sessions = list(session_ids) if session_ids is not None else list(range(session_count))
+        self.session_index = {session_id: i for i, session_id in enumerate(self.sessions)}
+
+    def presence(self):
+        """Unpacked (sessions x students) bool matrix."""
+        return np.unpackbits(self.packed, axis=1, count=len(self.students)).astype(bool)
+
+    def present_counts(self):
+        return self.presence().sum(axis=0)
+
+    def percentages(self, counts=None):
+        """Attendance % per student, rounded to one decimal (counts: present_counts())."""
+        if not self.session_count:
+            return np.zeros(len(self.students))
+        counts = self.present_counts() if counts is None else counts
+        return np.round(counts * 100.0 / self.session_count, 1)
+
+    def session_map(self, session):
+        """{student: "Present"/"Absent"} for one session."""
+        row = np.unpackbits(self.packed[session], count=len(self.students))
+        return {name: STATUS_LABELS[bit] for name, bit in zip(self.students, row.tolist())}
+
+    def student_history(self, name):
+        """Per-session presence of one student, in session order (bit shift on the packed column)."""
+        column = self.student_index[name]
+        byte, bit = divmod(column, 8)
+        return ((self.packed[:, byte] >> (7 - bit)) & 1).astype(bool)
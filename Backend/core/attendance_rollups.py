@@ -0,0 +1,270 @@
+import json
+import os
+import threading
+from collections import defaultdict
+import pandas as pd
+from core.aws_clients import get_client
+from core.report_ingest import ingest_reports, iter_report_objects
+from core.report_sidecar import normalize_report_frame
+
+BUCKET_NAME = os.getenv("BUCKET_NAME", "ict-attendance")
+ROLLUPS_FILE = os.getenv("ROLLUPS_FILE", "attendance_rollups.json")
+ROLLUPS_KEY = "manifests/attendance_rollups.json"
+
+REQUIRED_COLUMNS = ['date', 'subject', 'student name', 'er number', 'status']
+LOADED_COLUMNS = REQUIRED_COLUMNS + ['batch', 'class']
+HISTORY_COLUMNS = ['report', 'batch', 'section', 'subject', 'date', 'er', 'name', 'status']
+CATEGORY_COLUMNS = ['report', 'batch', 'section', 'subject', 'status']
+
+_store = None
+_lock = threading.Lock()
+
+
+def _empty_store():
+    # reports: {report_key: etag or None} - reports already folded in
+    # rows: {"batch|section|subject|date": {"batch", "section", "subject", "date",
+    #        "reports": n, "present": [er...], "absent": [er...]}}
+    # names: {er_number: student name}
+    return {"reports": {}, "rows": {}, "names": {}}
+
+
+def _report_rows(df):
+    """Report frame -> tidy [batch, section, subject, date, er, name, status] frame."""
+    df = normalize_report_frame(df)
+    columns = {col.lower(): col for col in df.columns}
+    missing = [col for col in REQUIRED_COLUMNS if col not in columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {missing}")
+
+    def column(name, default="-"):
+        return df[columns[name]].astype("string") if name in columns else default
+
+    rows = pd.DataFrame({
+        "batch": column("batch"),
+        "section": column("class"),
+        "subject": column("subject"),
+        "date": df[columns["date"]].dt.strftime("%Y-%m-%d"),
+        "er": column("er number").str.strip(),
+        "name": column("student name"),
+        "status": column("status").str.strip().str.lower(),
+    })
+    return rows.dropna(subset=["date", "er"]).fillna({"batch": "-", "section": "-", "subject": "-"})
+
+
+def _merge_history(store, history):
+    """Fold a tidy history frame (HISTORY_COLUMNS) into the rollup rows."""
+    groups = history.groupby(["batch", "section", "subject", "date"], sort=False, observed=True)
+    for (batch, section, subject, date), group in groups:
+        row_key = "|".join((batch, section, subject, date))
+        row = store["rows"].setdefault(row_key, {
+            "batch": batch, "section": section, "subject": subject, "date": date,
+            "reports": 0, "present": [], "absent": [],
+        })
+        is_present = group["status"] == "present"
+        present = set(row["present"]) | set(group.loc[is_present, "er"])
+        absent = (set(row["absent"]) | set(group.loc[~is_present, "er"])) - present
+        row.update(
+            reports=row["reports"] + group["report"].nunique(),
+            present=sorted(present), absent=sorted(absent),
+        )
+
+    store["names"].update(zip(history["er"], history["name"].astype("string").fillna("")))
+
+
+def _fold(store, report_key, df, etag=None):
+    """Add one report to the rollups (no-op if it is already folded in)."""
+    if report_key in store["reports"]:
+        return
+    store["reports"][report_key] = etag
+    try:
+        rows = _report_rows(df)
+    except Exception as e:
+        print(f"⚠️ Report {report_key} left out of the rollups: {e}")
+        return
+    _merge_history(store, rows.assign(report=report_key))
+
+
+def load_attendance_history(report_objects, sidecar_keys=(), s3_bucket=BUCKET_NAME):
+    """
+    Every report as one tidy frame (HISTORY_COLUMNS), used to rebuild the rollups.
+    Only LOADED_COLUMNS are read, frames are concatenated once and the repeated
+    columns are categoricals. Returns (history, {report key: ETag}) - reports
+    that could not be used are listed with their ETag but have no rows.
+    """
+    frames, etags = [], {}
+    for obj, df in ingest_reports(report_objects, sidecar_keys, s3_bucket, columns=LOADED_COLUMNS):
+        etags[obj["Key"]] = obj["ETag"]
+        try:
+            frames.append(_report_rows(df).assign(report=obj["Key"]))
+        except Exception as e:
+            print(f"⚠️ Report {obj['Key']} left out of the rollups: {e}")
+
+    history = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=HISTORY_COLUMNS, dtype="string")
+    history = history[HISTORY_COLUMNS]
+    for col in CATEGORY_COLUMNS:
+        history[col] = history[col].astype("category")
+    return history, etags
+
+
+def load_rollups(s3_bucket=BUCKET_NAME):
+    """Rollups persisted earlier: memory, then local file, then S3."""
+    global _store
+    with _lock:
+        if _store is not None:
+            return _store
+
+        store = None
+        if os.path.exists(ROLLUPS_FILE):
+            with open(ROLLUPS_FILE, encoding="utf-8") as f:
+                store = json.load(f)
+        else:
+            try:
+                obj = get_client("s3").get_object(Bucket=s3_bucket, Key=ROLLUPS_KEY)
+                store = json.loads(obj["Body"].read())
+            except Exception as e:
+                print(f"⚠️ No attendance rollups yet, they will be built from the reports: {e}")
+        _store = store or _empty_store()
+        return _store
+
+
+def save_rollups(s3_bucket=BUCKET_NAME):
+    """Write the rollups locally and mirror them to S3."""
+    with _lock:
+        data = json.dumps(_store or _empty_store())
+    with open(ROLLUPS_FILE, "w", encoding="utf-8") as f:
+        f.write(data)
+    get_client("s3").put_object(Bucket=s3_bucket, Key=ROLLUPS_KEY, Body=data.encode("utf-8"))
+
+
+def _persist(s3_bucket):
+    try:
+        save_rollups(s3_bucket)
+    except Exception as e:
+        print(f"⚠️ Could not persist attendance rollups: {e}")
+
+
+def fold_report(report_key, df, s3_bucket=BUCKET_NAME):
+    """Incremental update for a freshly written report (see save_attendance_to_excel)."""
+    store = load_rollups(s3_bucket)
+    with _lock:
+        _fold(store, report_key, df)
+    _persist(s3_bucket)
+
+
+def rebuild_rollups(report_objects=None, sidecar_keys=None, s3_bucket=BUCKET_NAME):
+    """
+    Recompute the rollups from every .xlsx report in the bucket (or the given
+    listing): the whole history is loaded as one frame and grouped once.
+    """
+    global _store
+    if report_objects is None:
+        sidecar_keys = set()
+        report_objects = iter_report_objects(s3_bucket, "reports/", (".xlsx",), sidecar_keys)
+
+    history, etags = load_attendance_history(report_objects, sidecar_keys or (), s3_bucket)
+    store = _empty_store()
+    store["reports"].update(etags)
+    _merge_history(store, history)
+
+    with _lock:
+        _store = store
+    _persist(s3_bucket)
+    return store
+
+
+def sync_rollups(report_objects, sidecar_keys=(), s3_bucket=BUCKET_NAME):
+    """
+    Bring the rollups in line with a reports listing and return them.
+    New reports are folded in; a deleted or rewritten report (ETag changed)
+    triggers a rebuild from history.
+    """
+    store = load_rollups(s3_bucket)
+    listed = {obj["Key"]: obj["ETag"] for obj in report_objects}
+
+    with _lock:
+        folded = dict(store["reports"])
+    if any(key not in listed or (etag is not None and etag != listed[key]) for key, etag in folded.items()):
+        return rebuild_rollups(report_objects, sidecar_keys, s3_bucket)
+
+    new_objects = [obj for obj in report_objects if obj["Key"] not in folded]
+    changed = bool(new_objects)
+    with _lock:
+        # Reports folded at write time learn their ETag from the first listing
+        for key, etag in folded.items():
+            if etag is None:
+                store["reports"][key] = listed[key]
+                changed = True
+
+    for obj, df in ingest_reports(new_objects, sidecar_keys, s3_bucket, columns=LOADED_COLUMNS):
+        with _lock:
+            _fold(store, obj["Key"], df, obj["ETag"])
+    with _lock:
+        for obj in new_objects:
+            # Unreadable reports are not retried until their ETag changes
+            store["reports"].setdefault(obj["Key"], obj["ETag"])
+
+    if changed:
+        _persist(s3_bucket)
+    return store
+
+
+def summarize_rollups(store):
+    """
+    Dashboard aggregates, computed from the rollup rows only:
+    students (present / total sessions), daily present counts,
+    present students per subject and the average attendance %.
+    """
+    with _lock:
+        rows = list(store["rows"].values())
+        names = dict(store["names"])
+
+    sessions = set()                      # (date, subject)
+    present_sessions = defaultdict(set)   # er -> {(date, subject)}
+    present_by_date = defaultdict(set)    # date -> {er}
+    present_by_subject = defaultdict(set) # subject -> {er}
+    dates, all_students = set(), set()
+
+    for row in rows:
+        session = (row["date"], row["subject"])
+        sessions.add(session)
+        dates.add(row["date"])
+        all_students.update(row["present"], row["absent"])
+        for er in row["present"]:
+            present_sessions[er].add(session)
+        present_by_date[row["date"]].update(row["present"])
+        present_by_subject[row["subject"]].update(row["present"])
+
+    total_classes = len(sessions)
+    students = []
+    for er in (er for er in names if er in all_students):
+        present_count = len(present_sessions.get(er, ()))
+        students.append({
+            "name": names[er],
+            "er_number": er,
+            "present_count": present_count,
+            "total_classes": total_classes,
+            "attendance_percentage": round(present_count / total_classes * 100, 1) if total_classes else 0.0,
+        })
+
+    daily_trend_data = [
+        {"date": date, "attendance": len(ers)}
+        for date, ers in sorted(present_by_date.items()) if ers
+    ]
+    subject_counts = {subject: len(ers) for subject, ers in sorted(present_by_subject.items()) if ers}
+
+    possible = len(all_students) * len(dates)
+    attended = sum(len(ers) for ers in present_by_date.values())
+    avg_attendance_pct = round(attended / possible * 100, 1) if possible else 0.0
+
+    return {
+        "students": students,
+        "daily_trend_data": daily_trend_data,
+        "subject_counts": subject_counts,
+        "avg_attendance_pct": avg_attendance_pct,
+    }
+
+
+if __name__ == "__main__":
+    # Rebuild from history: python -m core.attendance_rollups (run from Backend/)
+    rebuilt = rebuild_rollups()
+    print(f"✅ Rebuilt {len(rebuilt['rows'])} rollup rows from {len(rebuilt['reports'])} reports.")
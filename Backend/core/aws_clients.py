@@ -0,0 +1,54 @@
+import os
+import threading
+import boto3
+from botocore.config import Config
+from dotenv import load_dotenv
+
+load_dotenv()
+
+AWS_REGION = os.getenv("AWS_REGION", "ap-south-1")
+# Both spellings are used across .env files; fall back to the default boto3 chain
+AWS_ACCESS_KEY = os.getenv("AWS_ACCESS_KEY") or os.getenv("AWS_ACCESS_KEY_ID")
+AWS_SECRET_KEY = os.getenv("AWS_SECRET_KEY") or os.getenv("AWS_SECRET_ACCESS_KEY")
+
+# Connection pool / retry tuning shared by every client
+AWS_MAX_POOL_CONNECTIONS = int(os.getenv("AWS_MAX_POOL_CONNECTIONS", "32"))
+AWS_MAX_ATTEMPTS = int(os.getenv("AWS_MAX_ATTEMPTS", "5"))
+AWS_RETRY_MODE = os.getenv("AWS_RETRY_MODE", "adaptive")
+AWS_TCP_KEEPALIVE = os.getenv("AWS_TCP_KEEPALIVE", "true").lower() == "true"
+
+_session = None
+_clients = {}   # {(service, region): client}
+_lock = threading.Lock()
+
+
+def client_config():
+    return Config(
+        max_pool_connections=AWS_MAX_POOL_CONNECTIONS,
+        tcp_keepalive=AWS_TCP_KEEPALIVE,
+        retries={"max_attempts": AWS_MAX_ATTEMPTS, "mode": AWS_RETRY_MODE},
+    )
+
+
+def get_client(service, region=None):
+    """
+    Shared boto3 client for a service/region, created on first use.
+    boto3 clients are thread-safe, so every request and worker thread reuses the
+    same pooled keep-alive connections instead of building a client per call.
+    """
+    key = (service, region or AWS_REGION)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    global _session
+    with _lock:
+        if key not in _clients:
+            # Sessions are not thread-safe: create clients only under the lock
+            if _session is None:
+                _session = boto3.session.Session(
+                    aws_access_key_id=AWS_ACCESS_KEY,
+                    aws_secret_access_key=AWS_SECRET_KEY,
+                )
+            _clients[key] = _session.client(service, region_name=key[1], config=client_config())
+        return _clients[key]
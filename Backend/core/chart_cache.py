@@ -0,0 +1,68 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+# Rendered dashboard charts kept in memory, and an optional folder to persist them
+CHART_CACHE_MAX_ENTRIES = int(os.getenv("CHART_CACHE_MAX_ENTRIES", "16"))
+CHART_CACHE_DIR = os.getenv("CHART_CACHE_DIR", "")
+
+
+def report_fingerprint(objects):
+    """Fingerprint of a reports listing: sha256 over the sorted (key, ETag) pairs."""
+    digest = hashlib.sha256()
+    for key, etag in sorted((obj["Key"], obj["ETag"]) for obj in objects):
+        digest.update(f"{key}\t{etag}\n".encode())
+    return digest.hexdigest()
+
+
+class ChartCache:
+    """
+    LRU of rendered charts keyed by (chart name, input fingerprint).
+    With cache_dir set every chart is also written to disk, so renders survive
+    restarts and are shared between worker processes.
+    """
+
+    def __init__(self, max_entries, cache_dir=None):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir or None
+        self._entries = OrderedDict()   # {(name, fingerprint): bytes}
+        self._lock = threading.Lock()
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, name, fingerprint):
+        return os.path.join(self.cache_dir, f"{name}-{fingerprint}.png")
+
+    def get(self, name, fingerprint):
+        key = (name, fingerprint)
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                return data
+        if not self.cache_dir or not os.path.exists(self._path(name, fingerprint)):
+            return None
+        with open(self._path(name, fingerprint), "rb") as f:
+            data = f.read()
+        self._remember(key, data)
+        return data
+
+    def put(self, name, fingerprint, data):
+        self._remember((name, fingerprint), data)
+        if self.cache_dir:
+            try:
+                with open(self._path(name, fingerprint), "wb") as f:
+                    f.write(data)
+            except OSError as e:
+                print(f"⚠️ Could not persist chart {name}: {e}")
+
+    def _remember(self, key, data):
+        with self._lock:
+            self._entries[key] = data
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+chart_cache = ChartCache(CHART_CACHE_MAX_ENTRIES, CHART_CACHE_DIR)
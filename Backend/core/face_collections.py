@@ -0,0 +1,186 @@
+import json
+import os
+import sys
+import threading
+from core.aws_clients import get_client
+from core.roster_index import load_roster, sanitize_for_s3_key
+
+BUCKET_NAME = 'ict-attendance'
+MANIFEST_DIR = 'face_manifests'
+MANIFEST_PREFIX = 'manifests/'
+COLLECTION_PREFIX = 'students-'
+SHARED_COLLECTION_ID = 'students'   # single collection every batch was indexed into before
+
+_manifests = {}          # {collection_id: {face_id: student}}
+_known_collections = set()
+_backfilled = set()      # batch collections already backfilled from the roster in this process
+_lock = threading.Lock()
+
+
+def collection_id_for_batch(batch_name):
+    """Rekognition collection holding only the faces of one batch."""
+    return f"{COLLECTION_PREFIX}{sanitize_for_s3_key(batch_name)}"
+
+
+def ensure_collection(rekognition, collection_id):
+    """Create the collection on first use (no-op once seen in this process)."""
+    if collection_id in _known_collections:
+        return
+    try:
+        rekognition.create_collection(CollectionId=collection_id)
+        print(f"✅ Rekognition Collection '{collection_id}' created")
+    except rekognition.exceptions.ResourceAlreadyExistsException:
+        pass
+    _known_collections.add(collection_id)
+
+
+def forget_collection(collection_id):
+    """Drop a collection from the seen set (it was deleted behind our back)."""
+    with _lock:
+        _known_collections.discard(collection_id)
+
+
+def _manifest_path(collection_id):
+    return os.path.join(MANIFEST_DIR, f"{collection_id}.json")
+
+
+def _manifest_key(collection_id):
+    return f"{MANIFEST_PREFIX}{collection_id}.json"
+
+
+def load_manifest(collection_id, s3_bucket=BUCKET_NAME):
+    """
+    faceId -> {er_number, name, batch, s3_key} for one collection.
+    Loaded once per process: memory, then local file, then S3.
+    """
+    with _lock:
+        if collection_id in _manifests:
+            return _manifests[collection_id]
+
+        faces = {}
+        path = _manifest_path(collection_id)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                faces = json.load(f)
+        else:
+            try:
+                obj = get_client('s3').get_object(Bucket=s3_bucket, Key=_manifest_key(collection_id))
+                faces = json.loads(obj['Body'].read())
+            except Exception as e:
+                print(f"⚠️ No face manifest for {collection_id}: {e}")
+
+        _manifests[collection_id] = faces
+        return faces
+
+
+def save_manifest(collection_id, s3_bucket=BUCKET_NAME):
+    """Write the manifest locally and mirror it to S3."""
+    with _lock:
+        faces = dict(_manifests.get(collection_id, {}))
+
+    os.makedirs(MANIFEST_DIR, exist_ok=True)
+    path = _manifest_path(collection_id)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(faces, f, indent=2)
+
+    get_client('s3').upload_file(path, s3_bucket, _manifest_key(collection_id))
+
+
+def record_indexed_faces(collection_id, face_records, er_number, name, batch_name, s3_key):
+    """Add the FaceRecords returned by index_faces to the collection manifest."""
+    faces = load_manifest(collection_id)
+    with _lock:
+        for record in face_records:
+            faces[record['Face']['FaceId']] = {
+                "er_number": er_number,
+                "name": name,
+                "batch": batch_name,
+                "s3_key": s3_key,
+            }
+    save_manifest(collection_id)
+
+
+def resolve_face(collection_id, face_id):
+    """Student for a FaceId, or None if the face is not in the manifest."""
+    return load_manifest(collection_id).get(face_id)
+
+
+def backfill_batch_collection(batch_name, s3_bucket=BUCKET_NAME, region="ap-south-1"):
+    """
+    Index every reference image of a batch roster into the batch's collection.
+    Students enrolled before per-batch collections only exist in the shared
+    collection; this copies them over (images already in the manifest are skipped).
+    Returns the number of newly indexed faces.
+    """
+    rekognition = get_client('rekognition', region)
+    collection_id = collection_id_for_batch(batch_name)
+    ensure_collection(rekognition, collection_id)
+
+    missing = set(unindexed_roster_images(batch_name, s3_bucket))
+    roster = load_roster(batch_name, s3_bucket)
+    indexed = 0
+    for er_number, student in roster["students"].items():
+        for s3_key in student["images"]:
+            if s3_key not in missing:
+                continue
+            try:
+                response = rekognition.index_faces(
+                    CollectionId=collection_id,
+                    Image={"S3Object": {"Bucket": s3_bucket, "Name": s3_key}},
+                    ExternalImageId=f"{er_number}_{student['name'].replace(' ', '_')}",
+                    DetectionAttributes=["DEFAULT"]
+                )
+            except Exception as e:
+                print(f"❌ Backfill failed for {s3_key}: {e}")
+                continue
+            if response["FaceRecords"]:
+                record_indexed_faces(
+                    collection_id, response["FaceRecords"],
+                    er_number, student["name"], batch_name, s3_key
+                )
+                indexed += len(response["FaceRecords"])
+            else:
+                print(f"⚠️ No face detected in {s3_key}")
+    with _lock:
+        _backfilled.add(collection_id)
+    return indexed
+
+
+def unindexed_roster_images(batch_name, s3_bucket=BUCKET_NAME):
+    """Reference images on the batch roster whose faces are not in the batch manifest."""
+    indexed_keys = {
+        face["s3_key"] for face in load_manifest(collection_id_for_batch(batch_name), s3_bucket).values()
+    }
+    roster = load_roster(batch_name, s3_bucket)
+    return [
+        s3_key
+        for student in roster["students"].values()
+        for s3_key in student["images"]
+        if s3_key not in indexed_keys
+    ]
+
+
+def ensure_batch_backfilled(batch_name, s3_bucket=BUCKET_NAME, region="ap-south-1"):
+    """
+    Backfill the batch collection once per process if the manifest does not
+    cover every roster image (students enrolled into the shared collection
+    only, or an interrupted backfill). Images without a detectable face never
+    get covered, which is why this runs at most once per process.
+    """
+    with _lock:
+        if collection_id_for_batch(batch_name) in _backfilled:
+            return
+    missing = unindexed_roster_images(batch_name, s3_bucket)
+    if not missing:
+        with _lock:
+            _backfilled.add(collection_id_for_batch(batch_name))
+        return
+    print(f"⚠️ {len(missing)} roster images of {batch_name} are not in its collection, backfilling")
+    backfill_batch_collection(batch_name, s3_bucket, region)
+
+
+if __name__ == "__main__":
+    # Backfill: python -m core.face_collections <batch name> (run from Backend/)
+    for name in sys.argv[1:]:
+        count = backfill_batch_collection(name)
+        print(f"✅ Indexed {count} faces into {collection_id_for_batch(name)}.")
@@ -0,0 +1,80 @@
+import io
+import os
+from PIL import Image, ImageOps
+
+# Group photos are resized to this longest side before recognition
+GROUP_IMAGE_MAX_DIMENSION = int(os.getenv("GROUP_IMAGE_MAX_DIMENSION", "1920"))
+# Rekognition accepts at most 5 MB of raw image bytes
+REKOGNITION_MAX_BYTES = 5 * 1024 * 1024
+
+
+def encode_jpeg(image, max_bytes=REKOGNITION_MAX_BYTES, quality=85, min_quality=50):
+    """Encode as JPEG, lowering quality until the result fits in max_bytes."""
+    while True:
+        buf = io.BytesIO()
+        image.save(buf, format="JPEG", quality=quality, optimize=True)
+        if buf.tell() <= max_bytes or quality <= min_quality:
+            return buf.getvalue()
+        quality -= 10
+
+
+def prepare_group_image(group_bytes, max_dimension=GROUP_IMAGE_MAX_DIMENSION, max_bytes=REKOGNITION_MAX_BYTES):
+    """
+    Normalize a classroom photo for recognition: apply the EXIF orientation,
+    downscale to max_dimension on the longest side and re-encode as JPEG under
+    max_bytes. Small photos that already fit are returned unchanged.
+    """
+    image = Image.open(io.BytesIO(group_bytes))
+    needs_rotation = image.getexif().get(0x0112, 1) != 1  # EXIF Orientation tag
+    if (
+        not needs_rotation
+        and max(image.size) <= max_dimension
+        and len(group_bytes) <= max_bytes
+        and image.format in ("JPEG", "PNG")
+    ):
+        return group_bytes
+
+    image = ImageOps.exif_transpose(image).convert("RGB")
+    image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+    return encode_jpeg(image, max_bytes)
+
+
+# Crop every detected face out of a group photo so each one can be searched on its own
+def crop_faces_from_group(group_bytes, face_details, padding=0.25, min_size=80):
+    """
+    One JPEG per detected face. Faces whose padded crop is
+    under min_size pixels (back rows of a downscaled photo) are upscaled to
+    min_size on the shorter side instead of dropped, since Rekognition
+    rejects smaller images.
+    """
+    image = Image.open(io.BytesIO(group_bytes))
+    image = image.convert("RGB")
+    img_w, img_h = image.size
+
+    crops = []
+    upscaled = 0
+    for face in face_details:
+        box = face["BoundingBox"]
+        pad_w = box["Width"] * padding
+        pad_h = box["Height"] * padding
+        left = max(0, int((box["Left"] - pad_w) * img_w))
+        top = max(0, int((box["Top"] - pad_h) * img_h))
+        right = min(img_w, int((box["Left"] + box["Width"] + pad_w) * img_w))
+        bottom = min(img_h, int((box["Top"] + box["Height"] + pad_h) * img_h))
+
+        if right <= left or bottom <= top:
+            print(f"⚠️ Skipping face with an empty bounding box: {box}")
+            continue
+
+        crop = image.crop((left, top, right, bottom))
+        if min(crop.size) < min_size:
+            scale = min_size / min(crop.size)
+            crop = crop.resize((max(min_size, round(crop.width * scale)),
+                                max(min_size, round(crop.height * scale))), Image.LANCZOS)
+            upscaled += 1
+
+        crops.append(encode_jpeg(crop, quality=90))
+
+    if upscaled:
+        print(f"ℹ️ Upscaled {upscaled} small face crops to {min_size}px")
+    return crops
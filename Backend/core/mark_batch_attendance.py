@@ -1,41 +1,55 @@
-import boto3
+from botocore.exceptions import ClientError
+import io
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import pandas as pd
 from openpyxl import Workbook
+from core.attendance_rollups import fold_report
+from core.aws_clients import get_client
+from core.face_preprocess import crop_faces_from_group, prepare_group_image
+from core.recognizers import RekognitionRecognizer, get_recognizer
+from core.reference_cache import reference_cache
+from core.report_sidecar import write_sidecar
+from core.reports_service import invalidate_report_rows
+from core.response_cache import invalidate_responses
+from core.result_cache import content_hash, recognition_cache
+from core.roster_index import load_roster, roster_students
 
-# Get individual student image bytes from S3
+# Parallel compare_faces calls per attendance run (keep under the Rekognition TPS limit)
+ATTENDANCE_MAX_WORKERS = int(os.getenv("ATTENDANCE_MAX_WORKERS", "4"))
+# compare_faces similarity threshold when the caller gives none
+COMPARE_DEFAULT_THRESHOLD = 80
+
+# Reports are uploaded from memory; set KEEP_LOCAL_REPORTS=true to also keep a local copy
+KEEP_LOCAL_REPORTS = os.getenv("KEEP_LOCAL_REPORTS", "false").lower() == "true"
+ATTENDANCE_REPORTS_DIR = os.getenv("ATTENDANCE_REPORTS_DIR", "attendance_reports")
+
+# Get individual student image bytes from S3 (served from the reference cache when valid)
 def get_photo_bytes_from_s3(bucket, key):
-    s3 = boto3.client('s3')
-    response = s3.get_object(Bucket=bucket, Key=key)
-    return response['Body'].read()
-
-# List all student image keys in a batch
-def list_student_images_from_s3(bucket, batch_prefix):
-    s3 = boto3.client('s3')
-    paginator = s3.get_paginator('list_objects_v2')
-    page_iterator = paginator.paginate(Bucket=bucket, Prefix=batch_prefix)
-
-    image_keys = []
-    for page in page_iterator:
-        for obj in page.get('Contents', []):
-            key = obj['Key']
-            if key.lower().endswith(('.jpg', '.jpeg', '.png')) and key != batch_prefix:
-                image_keys.append(key)
-    return image_keys
-
-# Extract ER number and student name from file name safely
-def extract_student_details_from_key(key):
-    filename = os.path.basename(key)  # e.g. "1234_John_Doe.png"
-    name_part, _ = os.path.splitext(filename)  # -> "1234_John_Doe"
-    parts = name_part.split('_')
-
-    if len(parts) >= 2:
-        er_number = parts[0]
-        name = " ".join(parts[1:])
-        return er_number.strip(), name.strip()
-
-    # Fallback if no underscore or malformed filename
-    return name_part.strip(), name_part.strip()
+    s3 = get_client('s3')
+    listed_etag = reference_cache.listed_etag(key)
+    if listed_etag:
+        cached = reference_cache.get(key, listed_etag)
+        if cached:
+            return cached[1]
+
+    # Unknown ETag: revalidate whatever we hold with a conditional GET
+    cached = reference_cache.get(key)
+    try:
+        if cached:
+            response = s3.get_object(Bucket=bucket, Key=key, IfNoneMatch=cached[0])
+        else:
+            response = s3.get_object(Bucket=bucket, Key=key)
+    except ClientError as e:
+        if cached and e.response.get('Error', {}).get('Code') in ('304', 'NotModified'):
+            return cached[1]
+        raise
+
+    data = response['Body'].read()
+    reference_cache.put(key, response['ETag'], data)
+    return data
 
 # Save attendance to Excel and upload to S3
 def save_attendance_to_excel(attendance_data, absent_data, batch_name, class_name, subject, s3_bucket, region):
@@ -50,125 +64,350 @@ def save_attendance_to_excel(attendance_data, absent_data, batch_name, class_nam
 
     filename = f"{current_date}_{current_time}_{safe_batch}_{safe_class}_{safe_subject}.xlsx"
 
-    # Save locally first
-    save_dir = "attendance_reports"
-    os.makedirs(save_dir, exist_ok=True)
-    filepath = os.path.join(save_dir, filename)
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Attendance"
+    # Write-only workbook: rows are streamed out instead of kept as cell objects
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Attendance")
 
     # Header row
-    ws.append(["ER Number", "Student Name", "Date", "Time", "Class", "Subject", "Batch", "Status"])
-
-    # ✅ Present students
-    for student in attendance_data:
-        ws.append([
-            student["er_number"],
-            student["name"],
-            now.strftime("%d-%m-%Y"),
-            now.strftime("%H:%M:%S"),
-            class_name,
-            subject,
-            batch_name,
-            "Present"
-        ])
+    header = ["ER Number", "Student Name", "Date", "Time", "Class", "Subject", "Batch", "Status"]
+    ws.append(header)
+    report_date = now.strftime("%d-%m-%Y")
+    report_time = now.strftime("%H:%M:%S")
 
-    # ✅ Absent students
-    for student in absent_data:
+    # ✅ Present students, then absent ones - each row goes straight to the sheet
+    students = [(student, "Present") for student in attendance_data] + [(student, "Absent") for student in absent_data]
+    for student, status in students:
         ws.append([
             student["er_number"],
             student["name"],
-            now.strftime("%d-%m-%Y"),
-            now.strftime("%H:%M:%S"),
+            report_date,
+            report_time,
             class_name,
             subject,
             batch_name,
-            "Absent"
+            status
         ])
+    buffer = io.BytesIO()
+    wb.save(buffer)
 
-    wb.save(filepath)
+    # Optional local copy (served by /attendance_reports/<filename>);
+    # written first because upload_fileobj closes the buffer
+    filepath = None
+    if KEEP_LOCAL_REPORTS:
+        os.makedirs(ATTENDANCE_REPORTS_DIR, exist_ok=True)
+        filepath = os.path.join(ATTENDANCE_REPORTS_DIR, filename)
+        with open(filepath, "wb") as f:
+            f.write(buffer.getvalue())
 
-    # ✅ Upload to S3
-    s3 = boto3.client("s3", region_name=region)
+    # ✅ Upload to S3 straight from memory
+    s3 = get_client("s3", region)
     s3_key = f"reports/{filename}"
-    s3.upload_file(filepath, s3_bucket, s3_key)
+    buffer.seek(0)
+    s3.upload_fileobj(buffer, s3_bucket, s3_key)
+
+    # ✅ Columnar sidecar for the analytics readers, built column-wise from the same records
+    report_df = pd.DataFrame({
+        "ER Number": [student["er_number"] for student, _ in students],
+        "Student Name": [student["name"] for student, _ in students],
+        "Date": report_date,
+        "Time": report_time,
+        "Class": class_name,
+        "Subject": subject,
+        "Batch": batch_name,
+        "Status": [status for _, status in students],
+    }, columns=header)
+    write_sidecar(s3_key, report_df, s3_bucket)
+
+    # ✅ Dashboard rollups updated incrementally
+    fold_report(s3_key, report_df, s3_bucket)
+
+    # New report shows up in the next reports query and dashboard responses
+    invalidate_report_rows()
+    invalidate_responses()
 
     # ✅ Return public file URL
     file_url = f"https://{s3_bucket}.s3.{region}.amazonaws.com/{s3_key}"
     return filepath, file_url
 
+# Compare one student reference image against one group photo
+def compare_student_to_group(rekognition, s3_bucket, key, group_bytes, threshold=80):
+    try:
+        student_bytes = get_photo_bytes_from_s3(s3_bucket, key)
+        response = rekognition.compare_faces(
+            SourceImage={'Bytes': student_bytes},
+            TargetImage={'Bytes': group_bytes},
+            SimilarityThreshold=threshold
+        )
+        return bool(response['FaceMatches'])
+    except Exception as e:
+        print(f"⚠️ Error comparing {key}: {e}")
+        return False
+
+# Try a student's reference images in order, stop at the first match
+def match_student_in_group(rekognition, s3_bucket, keys, group_bytes, on_progress=None, threshold=80):
+    for key in keys:
+        matched = compare_student_to_group(rekognition, s3_bucket, key, group_bytes, threshold)
+        if on_progress:
+            on_progress({"event": "compared", "key": key, "matched": matched})
+        if matched:
+            return key
+    return None
+
+# Load the batch roster index and let its stored ETags validate the reference cache
+def load_batch_roster(batch_name, s3_bucket):
+    roster = load_roster(batch_name, s3_bucket)
+    for student in roster["students"].values():
+        for key, etag in student["etags"].items():
+            if etag:
+                reference_cache.note_listing(key, etag)
+    return roster
+
+# Read the uploaded group photos once; their content hashes key the result cache
+def read_group_photos(group_image_files):
+    raw_photos = []
+    for group_img_file in group_image_files:
+        raw_photos.append(group_img_file.read())
+        group_img_file.seek(0)
+    return raw_photos, [content_hash(raw) for raw in raw_photos]
+
+# A repeated submission: replay the cached recognition result through on_progress
+# (the caller still writes a fresh report for this roll call)
+def replay_cached_run(cached, notify):
+    present, absent = cached
+    print("♻️ Reusing cached recognition result for identical group photos")
+    notify({"event": "started", "students": len(present) + len(absent)})
+    for student in present:
+        notify({"event": "present", "student": student})
+    return list(present), list(absent)
+
 def mark_batch_attendance_s3(
     batch_name,
     class_name,
     subject,
     group_image_files,
     s3_bucket='ict-attendance',
-    region='ap-south-1'
+    region='ap-south-1',
+    mode='compare',
+    collection_id=None,
+    max_workers=ATTENDANCE_MAX_WORKERS,
+    strategy='representative',
+    on_progress=None,
+    threshold=None
 ):
-    rekognition = boto3.client('rekognition', region_name=region)
-    batch_prefix = f"{batch_name}/"
+    """
+    on_progress, if given, is called (possibly from worker threads) with event dicts:
+    {"event": "started", "students": n}, {"event": "compared", ...} after every
+    Rekognition match call and {"event": "present", "student": {...}} the first time
+    a student is recognized.
+    threshold is the similarity percentage; None means COMPARE_DEFAULT_THRESHOLD here
+    and the recognizer's own default in collection mode.
+    Identical resubmissions (same photos, roster version and threshold) reuse the
+    recognition result from recognition_cache without any Rekognition calls; a new
+    report is still written for every run.
+    """
+    if mode == 'collection':
+        return mark_batch_attendance_collection(
+            batch_name, class_name, subject, group_image_files,
+            s3_bucket=s3_bucket, region=region, collection_id=collection_id,
+            on_progress=on_progress, threshold=threshold
+        )
+    threshold = threshold or COMPARE_DEFAULT_THRESHOLD
 
-    # ✅ Fetch only images from the selected batch
-    student_image_keys = list_student_images_from_s3(s3_bucket, batch_prefix)
+    notify = on_progress or (lambda event: None)
+    announced = set()
+    announce_lock = threading.Lock()
 
-    present_students = {}
+    rekognition = get_client('rekognition', region)
 
-    for group_img_file in group_image_files:
-        group_bytes = group_img_file.read()
+    # ✅ Batch roster from the roster index (no S3 listing)
+    roster = load_batch_roster(batch_name, s3_bucket)
+    batch_students = {student["er_number"]: student for student in roster_students(roster)}
+    image_owner = {
+        key: er_number
+        for er_number, student in roster["students"].items()
+        for key in student["images"]
+    }
 
-        detection = rekognition.detect_faces(
-            Image={'Bytes': group_bytes},
-            Attributes=['DEFAULT']
+    raw_photos, photo_hashes = read_group_photos(group_image_files)
+    run_key = (
+        "run", "compare", strategy, threshold, batch_name, roster["version"], tuple(photo_hashes)
+    )
+    cached = recognition_cache.get(run_key)
+    if cached:
+        attendance_list, absent_students = replay_cached_run(cached, notify)
+        excel_file_path, file_url = save_attendance_to_excel(
+            attendance_list, absent_students, batch_name, class_name, subject, s3_bucket, region
         )
-        if not detection['FaceDetails']:
+        return attendance_list, absent_students, file_url
+
+    # ✅ Prepare every group photo once and make sure it has faces
+    group_photos = []
+    for raw, photo_hash in zip(raw_photos, photo_hashes):
+        # Oriented, downscaled and re-encoded under the Rekognition byte limit
+        group_bytes = prepare_group_image(raw)
+
+        face_details = recognition_cache.get(("detect", "rekognition", photo_hash))
+        if face_details is None:
+            face_details = rekognition.detect_faces(
+                Image={'Bytes': group_bytes},
+                Attributes=['DEFAULT']
+            )['FaceDetails']
+            recognition_cache.put(("detect", "rekognition", photo_hash), face_details)
+        if not face_details:
             raise ValueError("❌ No face detected in group image.")
 
-        for key in student_image_keys:
-            try:
-                student_bytes = get_photo_bytes_from_s3(s3_bucket, key)
-                response = rekognition.compare_faces(
-                    SourceImage={'Bytes': student_bytes},
-                    TargetImage={'Bytes': group_bytes},
-                    SimilarityThreshold=80
-                )
-                if response['FaceMatches']:
-                    er_number, student_name = extract_student_details_from_key(key)
-                    er_number = er_number.strip()  # ensure no extra spaces
-                    student_name = student_name.strip()
-                    present_students[er_number] = {"er_number": er_number, "name": student_name}
-            except Exception as e:
-                print(f"⚠️ Error comparing {key}: {e}")
-                continue
+        group_photos.append(group_bytes)
 
-        group_img_file.seek(0)
+    # 'representative': one unit per student (first image, others only on a miss),
+    # skipping students already matched in an earlier photo.
+    # 'exhaustive': every student image against every photo.
+    if strategy == 'exhaustive':
+        units = [[key] for key in image_owner]
+    else:
+        units = [student["images"] for student in roster["students"].values() if student["images"]]
+    notify({"event": "started", "students": len(batch_students)})
 
-    # ✅ Build full batch student list
-    batch_students = []
-    for key in student_image_keys:
-        er_number, student_name = extract_student_details_from_key(key)
-        batch_students.append({
-            "er_number": er_number.strip(),
-            "name": student_name.strip()
-        })
+    def announce(key):
+        er_number = image_owner[key]
+        with announce_lock:
+            if er_number in announced:
+                return
+            announced.add(er_number)
+        notify({"event": "present", "student": batch_students[er_number]})
 
-    # ✅ Compute absent students
+    present_students = {}
+    pool = ThreadPoolExecutor(max_workers=max_workers) if max_workers and max_workers > 1 else None
+    try:
+        for group_bytes in group_photos:
+            if strategy == 'exhaustive':
+                todo = units
+            else:
+                todo = [
+                    keys for keys in units
+                    if image_owner[keys[0]] not in present_students
+                ]
+
+            def match(keys, group_bytes=group_bytes):
+                key = match_student_in_group(rekognition, s3_bucket, keys, group_bytes, notify, threshold)
+                if key:
+                    announce(key)
+                return key
+
+            # map() keeps task order, so merging stays deterministic
+            matched_keys = list(pool.map(match, todo)) if pool else [match(keys) for keys in todo]
+
+            for key in matched_keys:
+                if key:
+                    present_students[image_owner[key]] = batch_students[image_owner[key]]
+    finally:
+        if pool:
+            pool.shutdown()
+
+    # ✅ Compute absent students (one entry per student)
     absent_students = [
-        student for student in batch_students
-        if student["er_number"] not in present_students
+        student for er_number, student in batch_students.items()
+        if er_number not in present_students
     ]
 
     # ✅ Debug prints (optional, remove in production)
-    print("Batch students ER numbers:", [s["er_number"] for s in batch_students])
+    print("Batch students ER numbers:", list(batch_students.keys()))
     print("Present students ER numbers:", list(present_students.keys()))
     print("Absent students ER numbers:", [s["er_number"] for s in absent_students])
 
     # Save Excel for present students
     attendance_list = list(present_students.values())
+    recognition_cache.put(run_key, (attendance_list, absent_students))
     excel_file_path, file_url = save_attendance_to_excel(
-    attendance_list, absent_students, batch_name, class_name, subject, s3_bucket, region
-)
+        attendance_list, absent_students, batch_name, class_name, subject, s3_bucket, region
+    )
 
     # ✅ Return present, absent, and excel URL
-    return attendance_list, absent_students, file_url
\ No newline at end of file
+    return attendance_list, absent_students, file_url
+
+def mark_batch_attendance_collection(
+    batch_name,
+    class_name,
+    subject,
+    group_image_files,
+    s3_bucket='ict-attendance',
+    region='ap-south-1',
+    collection_id=None,
+    on_progress=None,
+    recognizer=None,
+    threshold=None
+):
+    """
+    Same result as mark_batch_attendance_s3, but every face in the group photos is
+    searched among the batch's indexed students (see core.recognizers).
+    API calls scale with faces in the room instead of students x photos.
+    recognizer defaults to the FACE_RECOGNIZER backend; collection_id forces a
+    specific (e.g. the old shared "students") Rekognition collection.
+    threshold (similarity %) is passed to the recognizer; None uses its default.
+    on_progress receives the same events as in mark_batch_attendance_s3.
+    """
+    notify = on_progress or (lambda event: None)
+    if recognizer is None:
+        recognizer = (
+            RekognitionRecognizer(region=region, collection_id=collection_id)
+            if collection_id else get_recognizer(region=region)
+        )
+
+    # ✅ Batch roster (a shared collection holds every batch, so matches are filtered by it)
+    roster = load_roster(batch_name, s3_bucket)
+    batch_students = {student["er_number"]: student for student in roster_students(roster)}
+
+    # Rekognition may search the shared collection until the batch one is backfilled
+    collection_for = getattr(recognizer, "collection_for", None)
+    backend = (type(recognizer).__name__, collection_for(batch_name) if collection_for else None)
+    raw_photos, photo_hashes = read_group_photos(group_image_files)
+    run_key = (
+        "run", "collection", backend, threshold, batch_name, roster["version"], tuple(photo_hashes)
+    )
+    cached = recognition_cache.get(run_key)
+    if cached:
+        attendance_list, absent_students = replay_cached_run(cached, notify)
+        excel_file_path, file_url = save_attendance_to_excel(
+            attendance_list, absent_students, batch_name, class_name, subject, s3_bucket, region
+        )
+        return attendance_list, absent_students, file_url
+    notify({"event": "started", "students": len(batch_students)})
+
+    present_students = {}
+    for raw, photo_hash in zip(raw_photos, photo_hashes):
+        # Detected faces + per-face matches for this exact photo and roster version
+        search_key = ("search", backend, threshold, batch_name, roster["version"], photo_hash)
+        matches = recognition_cache.get(search_key)
+        if matches is None:
+            # Oriented, downscaled and re-encoded under the Rekognition byte limit
+            group_bytes = prepare_group_image(raw)
+            faces = recognizer.detect(group_bytes)
+            if not faces:
+                raise ValueError("❌ No face detected in group image.")
+
+            face_images = crop_faces_from_group(group_bytes, faces)
+            matches = recognizer.search_faces(batch_name, face_images, threshold)
+            recognition_cache.put(search_key, matches)
+
+        for student in matches:
+            notify({"event": "compared", "matched": student is not None})
+            if not student:
+                continue
+            er_number = student["er_number"]
+            if er_number in batch_students and er_number not in present_students:
+                present_students[er_number] = batch_students[er_number]
+                notify({"event": "present", "student": batch_students[er_number]})
+
+    absent_students = [
+        student for er_number, student in batch_students.items()
+        if er_number not in present_students
+    ]
+
+    print("Present students ER numbers:", list(present_students.keys()))
+    print("Absent students ER numbers:", [s["er_number"] for s in absent_students])
+
+    attendance_list = list(present_students.values())
+    recognition_cache.put(run_key, (attendance_list, absent_students))
+    excel_file_path, file_url = save_attendance_to_excel(
+        attendance_list, absent_students, batch_name, class_name, subject, s3_bucket, region
+    )
+    return attendance_list, absent_students, file_url
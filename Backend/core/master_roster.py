@@ -0,0 +1,93 @@
+import io
+import os
+import threading
+import time
+import pandas as pd
+from botocore.exceptions import ClientError
+from core.aws_clients import get_client
+
+BUCKET_NAME = os.getenv("BUCKET_NAME", "ict-attendance")
+MASTER_STUDENTS_KEY = "reports/students.xlsx"   # columns [Batch, Section, Name]
+STUDENTS_WORKBOOK_KEY = "students.xlsx"         # written by update_excel.sync_students_to_excel
+
+# Within this window a cached workbook is served without asking S3 at all;
+# after it, one conditional GET (If-None-Match) revalidates it
+ROSTER_REVALIDATE_SECONDS = int(os.getenv("ROSTER_REVALIDATE_SECONDS", "30"))
+
+_workbooks = {}   # {(bucket, key): {"etag", "last_modified", "checked_at", "count", "groups"}}
+_lock = threading.Lock()
+
+
+def _group_students(df):
+    """{batch: {section: [names]}} from a [Batch, Section, Name] sheet."""
+    if not {"Batch", "Section", "Name"}.issubset(df.columns):
+        return {}
+    # Empty cells count as blank (and are dropped), not as the text "nan"
+    students = df[["Batch", "Section", "Name"]].fillna("").astype(str).apply(lambda col: col.str.strip())
+    students = students[(students != "").all(axis=1)]
+
+    groups = {}
+    for (batch, section), names in students.groupby(["Batch", "Section"], sort=False)["Name"]:
+        groups.setdefault(batch, {})[section] = names.tolist()
+    return groups
+
+
+def _summarize_workbook(body):
+    df = pd.read_excel(io.BytesIO(body))
+    df.columns = [str(c).strip() for c in df.columns]
+    return {"count": len(df), "groups": _group_students(df)}
+
+
+def load_workbook_summary(key, s3_bucket=BUCKET_NAME):
+    """
+    Parsed summary of a student workbook, downloaded and parsed only when its
+    ETag changes. Returned structures are shared - treat them as read-only.
+    """
+    cache_key = (s3_bucket, key)
+    with _lock:
+        entry = _workbooks.get(cache_key)
+    if entry and time.time() - entry["checked_at"] < ROSTER_REVALIDATE_SECONDS:
+        return entry
+
+    s3 = get_client("s3")
+    try:
+        if entry:
+            response = s3.get_object(Bucket=s3_bucket, Key=key, IfNoneMatch=entry["etag"])
+        else:
+            response = s3.get_object(Bucket=s3_bucket, Key=key)
+    except ClientError as e:
+        if entry and e.response.get("Error", {}).get("Code") in ("304", "NotModified"):
+            entry = dict(entry, checked_at=time.time())
+            with _lock:
+                _workbooks[cache_key] = entry
+            return entry
+        raise
+
+    entry = _summarize_workbook(response["Body"].read())
+    entry.update(
+        etag=response["ETag"],
+        last_modified=response.get("LastModified"),
+        checked_at=time.time(),
+    )
+    with _lock:
+        _workbooks[cache_key] = entry
+    return entry
+
+
+def invalidate_workbook(key=None, s3_bucket=BUCKET_NAME):
+    """Force the next read of key (or of every workbook) to revalidate."""
+    with _lock:
+        if key is None:
+            _workbooks.clear()
+        else:
+            _workbooks.pop((s3_bucket, key), None)
+
+
+def master_students(s3_bucket=BUCKET_NAME):
+    """{batch: {section: [names]}} from reports/students.xlsx."""
+    return load_workbook_summary(MASTER_STUDENTS_KEY, s3_bucket)["groups"]
+
+
+def student_count(s3_bucket=BUCKET_NAME):
+    """Number of rows in the synced students.xlsx."""
+    return load_workbook_summary(STUDENTS_WORKBOOK_KEY, s3_bucket)["count"]
@@ -1,113 +1,81 @@
-import io
 import os
-import pandas as pd
 from flask import Blueprint, jsonify
 from dotenv import load_dotenv
-import boto3
+from core.master_roster import student_count
+from core.report_ingest import ingest_reports, iter_report_objects
+from core.response_cache import cached_response
 
 # Load environment
 load_dotenv()
 
 AWS_REGION = os.getenv("AWS_REGION", "ap-south-1")
-AWS_ACCESS_KEY = os.getenv("AWS_ACCESS_KEY")
-AWS_SECRET_KEY = os.getenv("AWS_SECRET_KEY")
 BUCKET_NAME = os.getenv("BUCKET_NAME", "ict-attendance")
 
-# S3 client
-s3_client = boto3.client(
-    "s3",
-    region_name=AWS_REGION,
-    aws_access_key_id=AWS_ACCESS_KEY,
-    aws_secret_access_key=AWS_SECRET_KEY
-)
 
 dashboard_bp = Blueprint("dashboard_api", __name__)
 
 @dashboard_bp.route("/overview", methods=["GET"])
 def class_overview():
+    # Cached per data version; unchanged dashboards get a 304
+    return cached_response("overview", build_class_overview, BUCKET_NAME)
+
+
+def build_class_overview():
     try:
-        # Load master students list
-        s3_obj = s3_client.get_object(Bucket=BUCKET_NAME, Key="students.xlsx")
-        body = s3_obj["Body"].read()
-        df_students = pd.read_excel(io.BytesIO(body))
-        total_students = len(df_students)
-
-        # Attendance reports in S3
-        response = s3_client.list_objects_v2(Bucket=BUCKET_NAME, Prefix="reports/")
-        subjects_data = []
-        overall_trend = []
-
-        for obj in response.get("Contents", []):
-            key = obj["Key"]
-            if not key.endswith((".xlsx", ".csv")):
-                continue
+        # Master students list (cached, revalidated by ETag)
+        total_students = student_count(BUCKET_NAME)
 
-            s3_file = s3_client.get_object(Bucket=BUCKET_NAME, Key=key)
-            file_body = s3_file["Body"].read()
+        # Attendance reports in S3: paginated listing, fetched and parsed in parallel
+        # (columnar sidecar when present; headers normalized, Date typed).
+        # Each report is folded into running totals and then dropped.
+        total_count = total_students if total_students > 0 else 1
+        subject_totals = {}   # {(subject, batch): {"attendance", "reports", "presentCount"}}
+        overall_trend = []    # one entry per report and month, in listing order
 
-            # Load file
-            if key.endswith(".csv"):
-                df = pd.read_csv(io.BytesIO(file_body))
-            else:
-                df = pd.read_excel(io.BytesIO(file_body))
+        sidecar_keys = set()
+        report_objects = iter_report_objects(BUCKET_NAME, "reports/", sidecar_keys=sidecar_keys)
 
+        for obj, df in ingest_reports(report_objects, sidecar_keys, BUCKET_NAME):
             if df.empty:
                 continue
 
-            # Normalize headers
-            df.columns = [c.strip() for c in df.columns]
-
             # Subject and batch extraction
-            subject_name = df["Subject"].iloc[0] if "Subject" in df.columns else "Unknown"
-            batch_name = df["Batch"].iloc[0] if "Batch" in df.columns else "Unknown"
+            subject_name = str(df["Subject"].iloc[0]) if "Subject" in df.columns else "Unknown"
+            batch_name = str(df["Batch"].iloc[0]) if "Batch" in df.columns else "Unknown"
 
             # Attendance calculation
-            present_count = df[df["Status"].str.lower() == "present"]["ER Number"].nunique() \
-                if "Status" in df.columns and "ER Number" in df.columns else 0
-
-            total_count = total_students if total_students > 0 else 1
-            attendance_percent = round((present_count / total_count) * 100, 2)
+            has_status = "Status" in df.columns and "ER Number" in df.columns
+            present_df = df[df["Status"].str.lower() == "present"] if has_status else df.iloc[0:0]
+            present_count = int(present_df["ER Number"].nunique()) if has_status else 0
 
-            subjects_data.append({
-                "subject": subject_name,
-                "batch": batch_name,
-                "attendance": attendance_percent,
-                "presentCount": present_count,
-                "totalCount": total_count
-            })
+            totals = subject_totals.setdefault(
+                (subject_name, batch_name), {"attendance": 0.0, "reports": 0, "presentCount": 0}
+            )
+            totals["attendance"] += round((present_count / total_count) * 100, 2)
+            totals["reports"] += 1
+            totals["presentCount"] += present_count
 
             # Trend (by month)
-            if "Date" in df.columns:
-                df["Month"] = pd.to_datetime(
-                    df["Date"], format="%d-%m-%Y", errors="coerce"
-                ).dt.strftime("%b")
-
-                trend_counts = (
-                    df[df["Status"].str.lower() == "present"]
-                    .groupby("Month")["ER Number"]
-                    .nunique()
-                    .reset_index(name="present")
-                )
-
-                for _, row in trend_counts.iterrows():
+            if has_status and "Date" in df.columns:
+                monthly = present_df.groupby(present_df["Date"].dt.strftime("%b"))["ER Number"].nunique()
+                for month, present in monthly.items():
                     overall_trend.append({
-                        "month": row["Month"],
-                        "attendance": row["present"],
+                        "month": month,
+                        "attendance": int(present),
                         "subject_batch": f"{subject_name} ({batch_name})"
                     })
 
-        # ✅ Deduplicate & aggregate subjects by subject+batch
-        if subjects_data:
-            df_subjects = pd.DataFrame(subjects_data)
-            subjects_data = (
-                df_subjects.groupby(["subject", "batch"], as_index=False)
-                .agg({
-                    "attendance": "mean",
-                    "presentCount": "sum",
-                    "totalCount": "max"
-                })
-                .to_dict(orient="records")
-            )
+        # ✅ Subjects aggregated by subject+batch
+        subjects_data = [
+            {
+                "subject": subject,
+                "batch": batch,
+                "attendance": totals["attendance"] / totals["reports"],
+                "presentCount": totals["presentCount"],
+                "totalCount": total_count
+            }
+            for (subject, batch), totals in sorted(subject_totals.items())
+        ]
 
         # Overall stats
         avg_attendance = round(
@@ -0,0 +1,255 @@
+import io
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+import numpy as np
+from PIL import Image
+
+from core.aws_clients import get_client
+from core.face_collections import (
+    SHARED_COLLECTION_ID, collection_id_for_batch, ensure_batch_backfilled, load_manifest, resolve_face
+)
+
+# Which backend collection-mode attendance uses: "rekognition" or "local"
+FACE_RECOGNIZER = os.getenv("FACE_RECOGNIZER", "rekognition")
+LOCAL_EMBEDDINGS_DIR = os.getenv("LOCAL_EMBEDDINGS_DIR", "local_embeddings")
+
+
+class Recognizer(ABC):
+    """
+    Face recognition backend used by collection-mode attendance.
+    Students are indexed per batch; a search maps face images to students.
+    Thresholds are similarity percentages (0-100); None means the backend default.
+    """
+
+    default_threshold = 80
+
+    @abstractmethod
+    def index(self, batch_name, er_number, name, s3_key=None, image_bytes=None):
+        """Enroll one reference photo. Returns the ids of the indexed faces."""
+
+    @abstractmethod
+    def detect(self, image_bytes):
+        """Faces in an image as Rekognition-style dicts with a relative BoundingBox."""
+
+    @abstractmethod
+    def search(self, batch_name, face_bytes, threshold=None):
+        """Best matching student {er_number, name} for one face crop, or None."""
+
+    def search_faces(self, batch_name, face_images, threshold=None):
+        """One result (student or None) per face crop, in input order."""
+        return [self.search(batch_name, face_bytes, threshold) for face_bytes in face_images]
+
+
+class RekognitionRecognizer(Recognizer):
+    """AWS Rekognition: per-batch collections + faceId manifest (see face_collections)."""
+
+    def __init__(self, region="ap-south-1", collection_id=None):
+        self.region = region
+        self.collection_id = collection_id  # None = the batch's own collection
+        self.client = get_client('rekognition', region)
+
+    def collection_for(self, batch_name):
+        """
+        Collection searched for a batch. Roster images missing from the batch
+        manifest are backfilled first; the shared collection is only searched
+        while the batch collection is still empty.
+        """
+        if self.collection_id:
+            return self.collection_id
+        collection_id = collection_id_for_batch(batch_name)
+        ensure_batch_backfilled(batch_name, region=self.region)
+        if load_manifest(collection_id):
+            return collection_id
+        print(f"⚠️ {collection_id} is empty, searching the shared '{SHARED_COLLECTION_ID}' collection")
+        return SHARED_COLLECTION_ID
+
+    def index(self, batch_name, er_number, name, s3_key=None, image_bytes=None):
+        from core.upload_to_s3 import index_face_to_rekognition
+        return index_face_to_rekognition(er_number, name, s3_key, region=self.region, batch_name=batch_name)
+
+    def detect(self, image_bytes):
+        detection = self.client.detect_faces(
+            Image={'Bytes': image_bytes},
+            Attributes=['DEFAULT']
+        )
+        return detection['FaceDetails']
+
+    def search(self, batch_name, face_bytes, threshold=None):
+        collection_id = self.collection_for(batch_name)
+        try:
+            response = self.client.search_faces_by_image(
+                CollectionId=collection_id,
+                Image={'Bytes': face_bytes},
+                MaxFaces=1,
+                FaceMatchThreshold=threshold or self.default_threshold
+            )
+        except self.client.exceptions.InvalidParameterException:
+            # Crop had no usable face (blurred / side profile)
+            return None
+
+        for match in response.get('FaceMatches', []):
+            # Prefer the faceId manifest, fall back to parsing ExternalImageId
+            student = resolve_face(collection_id, match['Face']['FaceId'])
+            if student:
+                return {"er_number": student["er_number"], "name": student["name"]}
+            external_id = match['Face'].get('ExternalImageId')
+            if external_id:
+                er_number, _, name = external_id.partition('_')
+                return {"er_number": er_number, "name": name.replace('_', ' ')}
+        return None
+
+
+def pixel_embedding(image_bytes, size=64):
+    """
+    Deterministic stand-in embedding (normalized grayscale thumbnail).
+    Only meaningful for tests/benchmarks: pass it as LocalEmbeddingRecognizer(embed=...).
+    """
+    image = Image.open(io.BytesIO(image_bytes)).convert("L").resize((size, size))
+    vector = np.asarray(image, dtype=np.float32).ravel()
+    return vector - vector.mean()
+
+
+class LocalEmbeddingRecognizer(Recognizer):
+    """
+    Offline backend: every batch keeps its students' embeddings in one contiguous
+    float32 matrix (rows L2-normalized), so all faces of a group photo are matched
+    against the whole roster with a single matrix product.
+    Needs the optional face_recognition package unless embed and locate are
+    injected (embed: image bytes -> vector or None, locate: image bytes -> faces).
+    """
+
+    default_threshold = 92
+
+    def __init__(self, storage_dir=LOCAL_EMBEDDINGS_DIR, embed=None, locate=None):
+        self.storage_dir = storage_dir
+        self._matrices = {}   # {collection id: np.ndarray (n_faces, dim)}
+        self._students = {}   # {collection id: [{er_number, name}] aligned with matrix rows}
+        self._lock = threading.Lock()
+
+        if embed is None or locate is None:
+            try:
+                import face_recognition
+            except ImportError:
+                raise ImportError(
+                    "FACE_RECOGNIZER=local needs the face_recognition package "
+                    "(pip install face_recognition) or injected embed/locate functions"
+                ) from None
+            embed = embed or (lambda image_bytes: self._face_recognition_encoding(face_recognition, image_bytes))
+            locate = locate or (lambda image_bytes: self._face_recognition_locations(face_recognition, image_bytes))
+        self.embed = embed
+        self.locate = locate
+
+    @staticmethod
+    def _face_recognition_encoding(face_recognition, image_bytes):
+        pixels = np.asarray(Image.open(io.BytesIO(image_bytes)).convert("RGB"))
+        encodings = face_recognition.face_encodings(pixels)
+        return encodings[0] if encodings else None
+
+    @staticmethod
+    def _face_recognition_locations(face_recognition, image_bytes):
+        pixels = np.asarray(Image.open(io.BytesIO(image_bytes)).convert("RGB"))
+        height, width = pixels.shape[:2]
+        return [
+            {"BoundingBox": {
+                "Left": left / width, "Top": top / height,
+                "Width": (right - left) / width, "Height": (bottom - top) / height,
+            }}
+            for top, right, bottom, left in face_recognition.face_locations(pixels)
+        ]
+
+    def _path(self, collection_id):
+        return os.path.join(self.storage_dir, f"{collection_id}.npz")
+
+    def _load(self, collection_id):
+        if collection_id in self._matrices:
+            return
+        path = self._path(collection_id)
+        if os.path.exists(path):
+            data = np.load(path)
+            self._matrices[collection_id] = np.ascontiguousarray(data["matrix"], dtype=np.float32)
+            self._students[collection_id] = json.loads(str(data["students"]))
+        else:
+            self._matrices[collection_id] = None
+            self._students[collection_id] = []
+
+    def _save(self, collection_id):
+        os.makedirs(self.storage_dir, exist_ok=True)
+        np.savez(
+            self._path(collection_id),
+            matrix=self._matrices[collection_id],
+            students=json.dumps(self._students[collection_id])
+        )
+
+    def index(self, batch_name, er_number, name, s3_key=None, image_bytes=None):
+        if image_bytes is None:
+            raise ValueError("Local recognizer needs the image bytes to index a face")
+        vector = self.embed(image_bytes)
+        if vector is None:
+            print(f"⚠️ No face detected in {s3_key or er_number}")
+            return []
+
+        vector = np.asarray(vector, dtype=np.float32)
+        vector = vector / (np.linalg.norm(vector) or 1.0)
+        collection_id = collection_id_for_batch(batch_name)
+        with self._lock:
+            self._load(collection_id)
+            matrix = self._matrices[collection_id]
+            self._matrices[collection_id] = vector[None, :] if matrix is None else np.vstack([matrix, vector])
+            self._students[collection_id].append({"er_number": er_number, "name": name.replace('_', ' ')})
+            self._save(collection_id)
+            row = len(self._students[collection_id]) - 1
+        return [f"local-{collection_id}-{row}"]
+
+    def detect(self, image_bytes):
+        return self.locate(image_bytes)
+
+    def search(self, batch_name, face_bytes, threshold=None):
+        return self.search_faces(batch_name, [face_bytes], threshold)[0]
+
+    def search_faces(self, batch_name, face_images, threshold=None):
+        collection_id = collection_id_for_batch(batch_name)
+        with self._lock:
+            self._load(collection_id)
+            matrix = self._matrices[collection_id]
+            students = self._students[collection_id]
+        if matrix is None or not face_images:
+            return [None] * len(face_images)
+
+        results = [None] * len(face_images)
+        rows, positions = [], []
+        for i, face_bytes in enumerate(face_images):
+            vector = self.embed(face_bytes)
+            if vector is not None:
+                rows.append(np.asarray(vector, dtype=np.float32))
+                positions.append(i)
+        if not rows:
+            return results
+
+        faces = np.vstack(rows)
+        faces /= np.linalg.norm(faces, axis=1, keepdims=True).clip(min=1e-12)
+        similarity = faces @ matrix.T          # (faces, enrolled images) cosine similarity
+        best = similarity.argmax(axis=1)
+        min_similarity = (threshold or self.default_threshold) / 100.0
+
+        for row, i in enumerate(positions):
+            if similarity[row, best[row]] >= min_similarity:
+                results[i] = dict(students[best[row]])
+        return results
+
+
+_recognizers = {}
+
+
+def get_recognizer(name=None, region="ap-south-1"):
+    """Shared recognizer instance for a backend name (defaults to FACE_RECOGNIZER)."""
+    name = name or FACE_RECOGNIZER
+    if name not in _recognizers:
+        if name == "local":
+            _recognizers[name] = LocalEmbeddingRecognizer()
+        elif name == "rekognition":
+            _recognizers[name] = RekognitionRecognizer(region=region)
+        else:
+            raise ValueError(f"Unknown face recognizer: {name}")
+    return _recognizers[name]
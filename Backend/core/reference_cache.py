@@ -0,0 +1,126 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+# Reference-photo cache size (MB) and optional spill folder for evicted images
+REFERENCE_CACHE_MB = int(os.getenv("REFERENCE_CACHE_MB", "256"))
+REFERENCE_CACHE_DIR = os.getenv("REFERENCE_CACHE_DIR", "")
+
+
+class ReferenceImageCache:
+    """
+    In-process LRU of student reference images, bounded by total bytes.
+    Entries are keyed by S3 key and remember the ETag they were fetched with,
+    so a listing (or a conditional GET) can tell whether they are still valid.
+    Evicted entries are spilled to disk when spill_dir is set; the spill folder
+    is an LRU of its own (same byte budget) and a spill file is removed as soon
+    as its entry is reloaded, replaced or found stale.
+    """
+
+    def __init__(self, max_bytes, spill_dir=None):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir or None
+        self._entries = OrderedDict()   # {s3_key: (etag, bytes)}
+        self._spilled = OrderedDict()   # {s3_key: (etag, size)} spill files written by this cache
+        self._spilled_size = 0
+        self._listed_etags = {}         # {s3_key: etag} from the latest listing
+        self._size = 0
+        self._lock = threading.Lock()
+        if self.spill_dir:
+            os.makedirs(self.spill_dir, exist_ok=True)
+
+    def _spill_path(self, key):
+        return os.path.join(self.spill_dir, hashlib.sha1(key.encode()).hexdigest())
+
+    def note_listing(self, key, etag):
+        """Record the ETag seen by list_objects_v2; stale entries get dropped."""
+        with self._lock:
+            self._listed_etags[key] = etag
+            entry = self._entries.get(key)
+            if entry and entry[0] != etag:
+                self._drop(key)
+            spilled = self._spilled.get(key)
+        if spilled and spilled[0] != etag:
+            self._unlink_spill(key)
+
+    def listed_etag(self, key):
+        return self._listed_etags.get(key)
+
+    def get(self, key, etag=None):
+        """Cached (etag, bytes) for key (matching etag when given), else None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and (etag is None or entry[0] == etag):
+                self._entries.move_to_end(key)
+                return entry
+        entry = self._read_spill(key)
+        if entry and (etag is None or entry[0] == etag):
+            self.put(key, *entry)   # back in memory, the spill file goes
+            return entry
+        if entry:
+            self._unlink_spill(key)
+        return None
+
+    def put(self, key, etag, data):
+        self._unlink_spill(key)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            if len(data) > self.max_bytes:
+                return
+            self._entries[key] = (etag, data)
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                old_key, (old_etag, old_data) = self._entries.popitem(last=False)
+                self._size -= len(old_data)
+                self._write_spill(old_key, old_etag, old_data)
+
+    def _drop(self, key):
+        _, data = self._entries.pop(key)
+        self._size -= len(data)
+
+    def _write_spill(self, key, etag, data):
+        # Called with the lock held
+        if not self.spill_dir:
+            return
+        try:
+            with open(self._spill_path(key), "wb") as f:
+                f.write(etag.encode() + b"\n" + data)
+        except OSError as e:
+            print(f"⚠️ Could not spill {key} to disk: {e}")
+            return
+        self._spilled_size += len(data) - self._spilled.pop(key, (None, 0))[1]
+        self._spilled[key] = (etag, len(data))
+        while self._spilled_size > self.max_bytes:
+            old_key, (_, size) = self._spilled.popitem(last=False)
+            self._spilled_size -= size
+            self._remove_spill_file(old_key)
+
+    def _remove_spill_file(self, key):
+        try:
+            os.remove(self._spill_path(key))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"⚠️ Could not remove spilled {key}: {e}")
+
+    def _unlink_spill(self, key):
+        if not self.spill_dir:
+            return
+        with self._lock:
+            self._spilled_size -= self._spilled.pop(key, (None, 0))[1]
+            self._remove_spill_file(key)
+
+    def _read_spill(self, key):
+        if not self.spill_dir:
+            return None
+        path = self._spill_path(key)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            etag, _, data = f.read().partition(b"\n")
+        return etag.decode(), data
+
+
+reference_cache = ReferenceImageCache(REFERENCE_CACHE_MB * 1024 * 1024, REFERENCE_CACHE_DIR)
@@ -0,0 +1,90 @@
+import json
+import os
+import threading
+from core.aws_clients import get_client
+from core.report_ingest import ingest_reports
+
+BUCKET_NAME = os.getenv("BUCKET_NAME", "ict-attendance")
+REPORT_INDEX_FILE = os.getenv("REPORT_INDEX_FILE", "report_index.json")
+REPORT_INDEX_KEY = "manifests/report_index.json"
+
+_index = None   # {s3_key: {"etag", "records", "students"}}
+_lock = threading.Lock()
+
+
+def summarize_report(key, df):
+    """Parsed report -> (records_count, students)."""
+    records_count, students = len(df), []
+    if key.endswith(".csv"):
+        if len(df.columns):
+            students = df.iloc[:, 0].dropna().astype(str).tolist()
+    elif "Name" in df.columns:
+        students = df["Name"].dropna().tolist()
+    return records_count, students
+
+
+def load_report_index(s3_bucket=BUCKET_NAME):
+    """Index persisted by earlier listings: memory, then local file, then S3."""
+    global _index
+    with _lock:
+        if _index is not None:
+            return _index
+
+        index = {}
+        if os.path.exists(REPORT_INDEX_FILE):
+            with open(REPORT_INDEX_FILE, encoding="utf-8") as f:
+                index = json.load(f)
+        else:
+            try:
+                obj = get_client("s3").get_object(Bucket=s3_bucket, Key=REPORT_INDEX_KEY)
+                index = json.loads(obj["Body"].read())
+            except Exception as e:
+                print(f"⚠️ No report index yet, it will be built on this listing: {e}")
+        _index = index
+        return _index
+
+
+def save_report_index(s3_bucket=BUCKET_NAME):
+    """Write the index locally and mirror it to S3."""
+    with _lock:
+        data = json.dumps(_index or {})
+    with open(REPORT_INDEX_FILE, "w", encoding="utf-8") as f:
+        f.write(data)
+    get_client("s3").put_object(Bucket=s3_bucket, Key=REPORT_INDEX_KEY, Body=data.encode("utf-8"))
+
+
+def refresh_report_index(objects, sidecar_keys=(), s3_bucket=BUCKET_NAME):
+    """
+    Bring the index in line with a reports/ listing and return it.
+    Only objects whose ETag is new or changed are downloaded and parsed;
+    entries for deleted reports are dropped.
+    """
+    index = load_report_index(s3_bucket)
+    listed = set()
+    changed = False
+
+    stale = []
+    for obj in objects:
+        listed.add(obj["Key"])
+        entry = index.get(obj["Key"])
+        if not entry or entry["etag"] != obj["ETag"]:
+            stale.append(obj)
+
+    # New / changed reports are fetched and parsed in parallel
+    for obj, df in ingest_reports(stale, sidecar_keys, s3_bucket):
+        records_count, students = summarize_report(obj["Key"], df)
+        with _lock:
+            index[obj["Key"]] = {"etag": obj["ETag"], "records": records_count, "students": students}
+        changed = True
+
+    with _lock:
+        for key in [key for key in index if key not in listed]:
+            del index[key]
+            changed = True
+
+    if changed:
+        try:
+            save_report_index(s3_bucket)
+        except Exception as e:
+            print(f"⚠️ Could not persist report index: {e}")
+    return index
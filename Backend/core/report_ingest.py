@@ -0,0 +1,129 @@
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from core.aws_clients import get_client
+from core.report_sidecar import SIDECAR_EXTENSION, parse_report_bytes, sidecar_key
+
+BUCKET_NAME = os.getenv("BUCKET_NAME", "ict-attendance")
+
+# Concurrent S3 GETs, parser processes (0 = parse in the fetch threads) and
+# how many report bodies may be in flight at once (bounds memory)
+INGEST_FETCH_WORKERS = int(os.getenv("INGEST_FETCH_WORKERS", "8"))
+INGEST_PARSE_WORKERS = int(os.getenv("INGEST_PARSE_WORKERS", "0"))
+INGEST_MAX_INFLIGHT = int(os.getenv("INGEST_MAX_INFLIGHT", "32"))
+# Parser processes are started fresh ("spawn"/"forkserver"), never forked from
+# the threaded web server, which could copy a lock held by another thread
+INGEST_START_METHOD = os.getenv("INGEST_START_METHOD", "spawn")
+
+_parse_pool = None
+_pool_lock = threading.Lock()
+_failed = {}   # {report key: ETag} of reports that could not be parsed
+_failed_lock = threading.Lock()
+
+
+def _get_parse_pool(parse_workers):
+    # pd.read_excel is CPU-bound and holds the GIL, so parsing can run in processes
+    global _parse_pool
+    with _pool_lock:
+        if _parse_pool is None:
+            _parse_pool = ProcessPoolExecutor(
+                max_workers=parse_workers,
+                mp_context=multiprocessing.get_context(INGEST_START_METHOD)
+            )
+        return _parse_pool
+
+
+class ReportParseError(ValueError):
+    """A report was downloaded but could not be parsed."""
+
+
+def failed_reports():
+    """{key: ETag} of reports skipped because they could not be parsed."""
+    with _failed_lock:
+        return dict(_failed)
+
+
+def _known_failure(obj):
+    with _failed_lock:
+        return obj["Key"] in _failed and _failed[obj["Key"]] == obj.get("ETag")
+
+
+def iter_report_objects(s3_bucket=BUCKET_NAME, prefix="reports/", extensions=(".xlsx", ".csv"), sidecar_keys=None):
+    """
+    Stream report objects page by page (follows continuation tokens).
+    Parquet sidecars are collected into sidecar_keys instead of being yielded;
+    "<name>.parquet" sorts before "<name>.xlsx", so a report's sidecar is always
+    known by the time the report itself is yielded.
+    """
+    paginator = get_client("s3").get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=s3_bucket, Prefix=prefix):
+        for obj in page.get("Contents", []):
+            key = obj["Key"]
+            if key.endswith(SIDECAR_EXTENSION):
+                if sidecar_keys is not None:
+                    sidecar_keys.add(key)
+                continue
+            if os.path.basename(key).lower() == "students.xlsx":
+                continue
+            if key.lower().endswith(extensions):
+                yield obj
+
+
+def _fetch_and_parse(obj, sidecar_keys, s3_bucket, pool, columns):
+    key = obj["Key"]
+    source_key = sidecar_key(key) if sidecar_key(key) in sidecar_keys else key
+    body = get_client("s3").get_object(Bucket=s3_bucket, Key=source_key)["Body"].read()
+    try:
+        if pool is None:
+            return parse_report_bytes(source_key, body, columns)
+        return pool.submit(parse_report_bytes, source_key, body, columns).result()
+    except Exception as e:
+        raise ReportParseError(f"{source_key}: {e}") from e
+
+
+def ingest_reports(
+    objects,
+    sidecar_keys=(),
+    s3_bucket=BUCKET_NAME,
+    fetch_workers=INGEST_FETCH_WORKERS,
+    parse_workers=INGEST_PARSE_WORKERS,
+    max_inflight=INGEST_MAX_INFLIGHT,
+    columns=None
+):
+    """
+    Yield (obj, DataFrame) for every report object, in input order.
+    Bodies are fetched on a thread pool and parsed in those threads (or in a
+    spawned process pool when parse_workers > 0), with at most max_inflight
+    reports fetched-but-not-consumed at any time. Reports that fail to download
+    or parse are reported and skipped; a report that failed to parse is not
+    fetched again until its ETag changes. columns restricts which report columns are read (see
+    parse_report_bytes).
+    """
+    pool = _get_parse_pool(parse_workers) if parse_workers > 0 else None
+    pending = deque()
+    objects = (obj for obj in objects if not _known_failure(obj))
+
+    with ThreadPoolExecutor(max_workers=fetch_workers) as fetchers:
+        def fill():
+            while len(pending) < max_inflight:
+                obj = next(objects, None)
+                if obj is None:
+                    return
+                pending.append((obj, fetchers.submit(_fetch_and_parse, obj, sidecar_keys, s3_bucket, pool, columns)))
+
+        fill()
+        while pending:
+            obj, future = pending.popleft()
+            try:
+                df = future.result()
+            except Exception as e:
+                print(f"⚠️ Could not load report {obj['Key']}: {e}")
+                if isinstance(e, ReportParseError):
+                    with _failed_lock:
+                        _failed[obj["Key"]] = obj.get("ETag")
+                df = None
+            fill()
+            if df is not None:
+                yield obj, df
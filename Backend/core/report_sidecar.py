@@ -0,0 +1,120 @@
+import io
+import os
+import pandas as pd
+import pyarrow.parquet as pq
+from pandas.api.types import is_datetime64_any_dtype
+from dotenv import load_dotenv
+from core.aws_clients import get_client
+
+load_dotenv()
+
+BUCKET_NAME = os.getenv("BUCKET_NAME", "ict-attendance")
+REPORTS_PREFIX = "reports/"
+SIDECAR_EXTENSION = ".parquet"
+
+# Columns written by save_attendance_to_excel and their sidecar types
+CATEGORY_COLUMNS = ["Class", "Subject", "Batch", "Status"]
+STRING_COLUMNS = ["ER Number", "Student Name", "Time"]
+REPORT_DATE_FORMAT = "%d-%m-%Y"
+
+
+def sidecar_key(report_key):
+    """reports/<name>.xlsx -> reports/<name>.parquet (listed next to the report)."""
+    return os.path.splitext(report_key)[0] + SIDECAR_EXTENSION
+
+
+def normalize_report_frame(df):
+    """
+    Typed copy of an attendance report: stripped headers, Date as datetime,
+    ER Number / names as strings and the repeated columns as categoricals.
+    The input frame is left untouched.
+    """
+    df = df.copy()
+    df.columns = [str(c).strip() for c in df.columns]
+    if "Date" in df.columns and not is_datetime64_any_dtype(df["Date"]):
+        df["Date"] = pd.to_datetime(df["Date"], format=REPORT_DATE_FORMAT, errors="coerce")
+    for col in STRING_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("string").str.strip()
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    return df
+
+
+def frame_to_sidecar_bytes(df):
+    buf = io.BytesIO()
+    normalize_report_frame(df).to_parquet(buf, index=False, engine="pyarrow")
+    return buf.getvalue()
+
+
+def write_sidecar(report_key, df, s3_bucket=BUCKET_NAME):
+    """Upload the columnar copy of a report; failures only cost the fast path."""
+    try:
+        get_client("s3").put_object(
+            Bucket=s3_bucket, Key=sidecar_key(report_key), Body=frame_to_sidecar_bytes(df)
+        )
+    except Exception as e:
+        print(f"⚠️ Could not write columnar sidecar for {report_key}: {e}")
+
+
+def parse_report_bytes(key, body, columns=None):
+    """
+    DataFrame for raw report bytes (.parquet sidecar, .xlsx or .csv).
+    columns: optional header names (case-insensitive) - other columns are not read.
+    """
+    wanted = {c.lower() for c in columns} if columns else None
+    usecols = (lambda c: str(c).strip().lower() in wanted) if wanted else None
+
+    if key.endswith(SIDECAR_EXTENSION):
+        read_columns = None
+        if wanted:
+            names = pq.read_schema(io.BytesIO(body)).names
+            read_columns = [n for n in names if n.strip().lower() in wanted]
+        return normalize_report_frame(pd.read_parquet(io.BytesIO(body), columns=read_columns))
+    if key.endswith(".csv"):
+        return normalize_report_frame(pd.read_csv(io.BytesIO(body), usecols=usecols))
+    return normalize_report_frame(pd.read_excel(io.BytesIO(body), usecols=usecols))
+
+
+def load_report_frame(key, sidecar_keys=(), s3_bucket=BUCKET_NAME):
+    """
+    Read one report, preferring its sidecar when the listing showed one.
+    sidecar_keys: set of .parquet keys seen in the same reports/ listing.
+    """
+    source_key = sidecar_key(key) if sidecar_key(key) in sidecar_keys else key
+    body = get_client("s3").get_object(Bucket=s3_bucket, Key=source_key)["Body"].read()
+    return parse_report_bytes(source_key, body)
+
+
+def backfill_sidecars(s3_bucket=BUCKET_NAME, prefix=REPORTS_PREFIX):
+    """Write sidecars for every .xlsx report that does not have one yet."""
+    s3 = get_client("s3")
+    report_keys, existing = [], set()
+    for page in s3.get_paginator("list_objects_v2").paginate(Bucket=s3_bucket, Prefix=prefix):
+        for obj in page.get("Contents", []):
+            key = obj["Key"]
+            if key.endswith(SIDECAR_EXTENSION):
+                existing.add(key)
+            elif key.endswith(".xlsx") and os.path.basename(key).lower() != "students.xlsx":
+                report_keys.append(key)
+
+    written = 0
+    for key in report_keys:
+        if sidecar_key(key) in existing:
+            continue
+        try:
+            body = s3.get_object(Bucket=s3_bucket, Key=key)["Body"].read()
+            df = pd.read_excel(io.BytesIO(body))
+            s3.put_object(Bucket=s3_bucket, Key=sidecar_key(key), Body=frame_to_sidecar_bytes(df))
+            written += 1
+            print(f"✅ Sidecar written: {sidecar_key(key)}")
+        except Exception as e:
+            print(f"❌ Sidecar failed for {key}: {e}")
+    return written
+
+
+if __name__ == "__main__":
+    # Backfill: python -m core.report_sidecar (run from Backend/)
+    count = backfill_sidecars()
+    print(f"✅ Backfilled {count} columnar sidecars.")
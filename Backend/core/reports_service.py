@@ -1,26 +1,38 @@
+import base64
+import bisect
+import heapq
+import json
 import os
-import io
-import csv
-import boto3
-import pandas as pd
+import threading
+import time
+from core.attendance_matrix import AttendanceMatrix
+from core.master_roster import master_students
+from core.report_index import refresh_report_index
+from core.report_ingest import iter_report_objects
 from datetime import datetime, timezone
+from itertools import islice
 from dotenv import load_dotenv
 
 # Load environment values
 load_dotenv()
 
 AWS_REGION = os.getenv("AWS_REGION", "ap-south-1")
-AWS_ACCESS_KEY = os.getenv("AWS_ACCESS_KEY")
-AWS_SECRET_KEY = os.getenv("AWS_SECRET_KEY")
 BUCKET_NAME = os.getenv("BUCKET_NAME", "ict-attendance")
 
-# Initialize S3 client
-s3_client = boto3.client(
-    "s3",
-    region_name=AWS_REGION,
-    aws_access_key_id=AWS_ACCESS_KEY,
-    aws_secret_access_key=AWS_SECRET_KEY,
-)
+# Report rows are re-listed at most this often; queries page through them in memory
+REPORT_ROWS_REFRESH_SECONDS = int(os.getenv("REPORT_ROWS_REFRESH_SECONDS", "30"))
+REPORT_QUERY_DEFAULT_LIMIT = 50
+REPORT_QUERY_MAX_LIMIT = 200
+REPORT_DEFAULT_FIELDS = {
+    "id", "fileName", "userFriendlyName", "batch", "section", "subject",
+    "generatedDate", "reportDate", "uploadedAt", "size", "records", "status", "url",
+}
+
+# rows / sort_keys: every report, oldest first by (reportDate, id)
+# groups: {(batch, section, subject): (rows, sort_keys)} in the same order
+_report_rows = {"rows": None, "sort_keys": [], "groups": {}, "built_at": 0.0}
+_rows_lock = threading.Lock()
+
 
 # 🔹 Subject mapping dictionary
 SUBJECT_MAP = {
@@ -34,19 +46,27 @@ SUBJECT_MAP = {
 
 def parse_metadata_from_filename(filename: str):
     """
-    Example filename: 20250825_2020-2024_A_OS.xlsx
-    -> date = 20250825, batch = 2020-2024, section = A, subject = OS
+    Example filename: 20250825_143000_2020-2024_A_OS.xlsx (save_attendance_to_excel)
+    -> date = 20250825, time = 143000, batch = 2020-2024, section = A, subject = OS
+    Spaces in names are written as "_", so everything between the time and
+    the last two parts is the batch. Older files without the time part
+    (20250825_2020-2024_A_OS.xlsx) are still understood.
     """
     try:
         name, _ = os.path.splitext(filename)
         parts = name.split("_")
 
-        if len(parts) >= 4:
-            date_str = parts[0]          # 20250825
-            batch = parts[1]             # 2020-2024
-            section = parts[2]           # A
-            subject_code = parts[3]      # OS
-
+        if len(parts) >= 5 and len(parts[1]) == 6 and parts[1].isdigit():
+            date_str = parts[0]                       # 20250825
+            batch = " ".join(parts[2:-2])             # 2020-2024
+            section = parts[-2]                       # A
+            subject_code = parts[-1]                  # OS
+        elif len(parts) >= 4:
+            date_str, batch, section, subject_code = parts[:4]
+        else:
+            date_str = None
+
+        if date_str:
             # Format date
             date_obj = datetime.strptime(date_str, "%Y%m%d")
             formatted_date = date_obj.strftime("%d %b %Y")
@@ -70,100 +90,153 @@ def load_master_students():
     Reads master student list from students.xlsx in S3.
     Expected format: columns [Batch, Section, Name]
     Returns: dict {batch: {section: [students]}}
+    Cached in memory and revalidated by ETag (see core.master_roster).
     """
     try:
-        s3_obj = s3_client.get_object(Bucket=BUCKET_NAME, Key="reports/students.xlsx")
-        body = s3_obj["Body"].read()
-        df = pd.read_excel(io.BytesIO(body))
-
-        master_students = {}
-        if {"Batch", "Section", "Name"}.issubset(df.columns):
-            for _, row in df.iterrows():
-                batch = str(row["Batch"]).strip()
-                section = str(row["Section"]).strip()
-                name = str(row["Name"]).strip()
-                if batch and section and name:
-                    master_students.setdefault(batch, {}).setdefault(section, []).append(name)
-
-        return master_students
+        return master_students(BUCKET_NAME)
     except Exception as e:
         print("⚠️ Could not load master student list:", e)
         return {}
 
 
+def build_report_row(obj, entry):
+    """One report as served by the reports APIs (listing object + index entry)."""
+    key = obj["Key"]
+    filename = os.path.basename(key)
+    batch, section, subject, formatted_date, user_friendly = parse_metadata_from_filename(filename)
+    report_date = (
+        datetime.strptime(formatted_date, "%d %b %Y").date().isoformat()
+        if formatted_date != "-" else ""
+    )
+    return {
+        "id": key,
+        "fileName": filename,
+        "userFriendlyName": user_friendly,
+        "batch": batch,
+        "section": section,
+        "subject": subject,
+        "generatedDate": formatted_date,
+        "reportDate": report_date,   # YYYY-MM-DD, used for filtering / ordering
+        "uploadedAt": obj["LastModified"].astimezone(timezone.utc).isoformat(),
+        "size": f"{obj['Size']/1024:.1f} KB",
+        "records": entry["records"],
+        "status": "ready",
+        "students": list(entry["students"]),
+        "url": f"https://{BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com/{key}",
+    }
+
+
+def _load_report_state(max_age):
+    with _rows_lock:
+        if _report_rows["rows"] is not None and time.time() - _report_rows["built_at"] < max_age:
+            return dict(_report_rows)
+
+    sidecar_keys = set()
+
+    # Paginated listing of CSV/XLSX reports (master student file skipped);
+    # sidecar keys are collected along the way
+    objects = list(iter_report_objects(BUCKET_NAME, "reports/", sidecar_keys=sidecar_keys))
+
+    # Only new or changed reports (by ETag) are downloaded and parsed
+    index = refresh_report_index(objects, sidecar_keys, BUCKET_NAME)
+
+    # Reports that could not be parsed stay listed, without records
+    rows = [build_report_row(obj, index.get(obj["Key"], {"records": 0, "students": []})) for obj in objects]
+    rows.sort(key=lambda row: (row["reportDate"], row["id"]))
+    sort_keys = [(row["reportDate"], row["id"]) for row in rows]
+
+    # Per (batch, section, subject) lists, still date-sorted, for filtered queries
+    groups = {}
+    for row, sort_key in zip(rows, sort_keys):
+        group_rows, group_keys = groups.setdefault((row["batch"], row["section"], row["subject"]), ([], []))
+        group_rows.append(row)
+        group_keys.append(sort_key)
+
+    with _rows_lock:
+        _report_rows.update(rows=rows, sort_keys=sort_keys, groups=groups, built_at=time.time())
+        return dict(_report_rows)
+
+
+def load_report_rows(max_age=REPORT_ROWS_REFRESH_SECONDS):
+    """
+    Every report as a row, refreshed from the listing when older than max_age
+    seconds (0 = always re-list). Rows are sorted oldest first by (reportDate, id).
+    """
+    state = _load_report_state(max_age)
+    return state["rows"], state["sort_keys"]
+
+
+def invalidate_report_rows():
+    """Make the next query re-list reports (call after a report is written)."""
+    with _rows_lock:
+        _report_rows["rows"] = None
+
+
+def _encode_cursor(row):
+    return base64.urlsafe_b64encode(json.dumps([row["reportDate"], row["id"]]).encode()).decode()
+
+
+def _decode_cursor(cursor):
+    return tuple(json.loads(base64.urlsafe_b64decode(cursor.encode())))
+
+
+def query_reports(batch=None, section=None, subject=None, date_from=None, date_to=None,
+                  cursor=None, limit=REPORT_QUERY_DEFAULT_LIMIT, fields=None):
+    """
+    Newest-first page of reports matching the filters.
+    date_from / date_to: inclusive YYYY-MM-DD bounds on the report date.
+    cursor: nextCursor of the previous page. fields: keys to return
+    (default: everything except the student list).
+    Returns {"reports": [...], "nextCursor": str | None}.
+    """
+    groups = _load_report_state(REPORT_ROWS_REFRESH_SECONDS)["groups"]
+    limit = max(1, min(int(limit), REPORT_QUERY_MAX_LIMIT))
+    fields = set(fields) if fields else REPORT_DEFAULT_FIELDS
+    # Subject filter accepts the code ("OS") or the full name
+    subject = SUBJECT_MAP.get(subject, subject) if subject else None
+
+    # Start just below the cursor, or below date_to when that is tighter
+    upper = _decode_cursor(cursor) if cursor else None
+    if date_to and (upper is None or (date_to + "\uffff",) < upper):
+        upper = (date_to + "\uffff",)
+
+    def newest_first(group_rows, group_keys):
+        position = bisect.bisect_left(group_keys, upper) if upper else len(group_keys)
+        for i in range(position - 1, -1, -1):
+            if date_from and group_keys[i][0] < date_from:
+                return
+            yield group_rows[i]
+
+    # Only the matching (batch, section, subject) lists are walked, merged newest first
+    if batch and section and subject:
+        keys = [(batch, section, subject)] if (batch, section, subject) in groups else []
+    else:
+        keys = [
+            key for key in groups
+            if (not batch or key[0] == batch)
+            and (not section or key[1] == section)
+            and (not subject or key[2] == subject)
+        ]
+    matching = [newest_first(*groups[key]) for key in keys]
+    merged = heapq.merge(*matching, key=lambda row: (row["reportDate"], row["id"]), reverse=True)
+    rows = list(islice(merged, limit + 1))
+
+    page = [{k: v for k, v in row.items() if k in fields} for row in rows[:limit]]
+    next_cursor = _encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return {"reports": page, "nextCursor": next_cursor}
+
+
 def list_s3_reports():
     try:
         grouped_reports = {}  # {batch: {section: [reports]}}
-        continuation_token = None
-
-        while True:
-            if continuation_token:
-                response = s3_client.list_objects_v2(
-                    Bucket=BUCKET_NAME, Prefix="reports/", ContinuationToken=continuation_token
-                )
-            else:
-                response = s3_client.list_objects_v2(
-                    Bucket=BUCKET_NAME, Prefix="reports/"
-                )
-
-            for obj in response.get("Contents", []):
-                key = obj["Key"]
-                filename = os.path.basename(key)
-
-                # 🚫 Skip master student file
-                if filename.lower() == "students.xlsx":
-                    continue
-
-                # Only process CSV/XLSX reports
-                if not key.lower().endswith((".csv", ".xlsx")):
-                    continue
-
-                # Download file content
-                s3_obj = s3_client.get_object(Bucket=BUCKET_NAME, Key=key)
-                body = s3_obj["Body"].read()
-
-                records_count, students = 0, []
-
-                if key.endswith(".csv"):
-                    rows = list(csv.reader(io.StringIO(body.decode("utf-8"))))
-                    if len(rows) > 1:
-                        records_count = len(rows) - 1
-                        students = [row[0] for row in rows[1:] if row]
-
-                elif key.endswith(".xlsx"):
-                    df = pd.read_excel(io.BytesIO(body))
-                    records_count = len(df)
-                    if "Name" in df.columns:
-                        students = df["Name"].dropna().tolist()
-
-                # Extract metadata
-                batch, section, subject, formatted_date, user_friendly = parse_metadata_from_filename(filename)
-
-                report = {
-                    "id": key,
-                    "fileName": filename,
-                    "userFriendlyName": user_friendly,
-                    "batch": batch,
-                    "section": section,
-                    "subject": subject,
-                    "generatedDate": formatted_date,
-                    "uploadedAt": obj["LastModified"].astimezone(timezone.utc).isoformat(),
-                    "size": f"{obj['Size']/1024:.1f} KB",
-                    "records": records_count,
-                    "status": "ready",
-                    "students": students,
-                    "url": f"https://{BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com/{key}",
-                    # will be filled later
-                    "attendanceMap": {}
-                }
-
-                # Insert into grouped structure
-                grouped_reports.setdefault(batch, {}).setdefault(section, []).append(report)
-
-            if response.get("IsTruncated"):
-                continuation_token = response.get("NextContinuationToken")
-            else:
-                break
+
+        rows, _ = load_report_rows()
+        for row in rows:
+            # attendanceMap will be filled later
+            report = dict(row, students=list(row["students"]), attendanceMap={})
+
+            # Insert into grouped structure
+            grouped_reports.setdefault(report["batch"], {}).setdefault(report["section"], []).append(report)
 
         return grouped_reports
 
@@ -179,29 +252,19 @@ def calculate_attendance_percentages(grouped_reports, master_students):
             students = master_students.get(batch, {}).get(section, [])
             total_classes = len(reports)
 
-            # Initialize counts
-            student_counts = {s: {"present": 0, "total": total_classes} for s in students}
-
-            # Mark presence/absence in each report
-            for report in reports:
-                present_students = set(report["students"])
-                attendance_map = {}
-                for s in students:
-                    if s in present_students:
-                        student_counts[s]["present"] += 1
-                        attendance_map[s] = "Present"
-                    else:
-                        attendance_map[s] = "Absent"
-                report["attendanceMap"] = attendance_map  # attach per-class status
-
-            # Compute %
-            for s, data in student_counts.items():
-                attended = data["present"]
-                total = data["total"]
-                pct = round((attended / total) * 100, 1) if total > 0 else 0
-                student_counts[s]["percentage"] = pct
-
-            results[(batch, section)] = student_counts
+            # Presence matrix: one row per report, one bit per student
+            matrix = AttendanceMatrix(students, (report["students"] for report in reports))
+
+            # Attach per-class status
+            for i, report in enumerate(reports):
+                report["attendanceMap"] = matrix.session_map(i)
+
+            # Compute % for the whole section at once
+            counts = matrix.present_counts()
+            results[(batch, section)] = {
+                s: {"present": attended, "total": total_classes, "percentage": pct}
+                for s, attended, pct in zip(matrix.students, counts.tolist(), matrix.percentages(counts).tolist())
+            }
 
     return results
 
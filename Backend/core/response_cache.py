@@ -0,0 +1,106 @@
+import hashlib
+import os
+import threading
+import time
+from flask import jsonify, make_response, request
+from core.aws_clients import get_client
+from core.master_roster import STUDENTS_WORKBOOK_KEY, load_workbook_summary
+from core.result_cache import TTLCache
+from core.single_flight import single_flight
+
+BUCKET_NAME = os.getenv("BUCKET_NAME", "ict-attendance")
+
+# How long a computed data version is trusted before the reports listing is
+# checked again, and how long rendered responses are kept
+DATA_VERSION_TTL_SECONDS = int(os.getenv("DATA_VERSION_TTL_SECONDS", "10"))
+RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "64"))
+
+_version = {"token": None, "checked_at": 0.0, "generation": 0}
+_lock = threading.Lock()
+
+# {(endpoint, data version): (body bytes, status, headers)}
+response_cache = TTLCache(RESPONSE_CACHE_TTL_SECONDS, RESPONSE_CACHE_MAX_ENTRIES)
+
+
+def _listing_state(s3_bucket):
+    """
+    sha256 over every (key, ETag) under reports/ plus the students workbook ETag,
+    so reports added, replaced or deleted from outside the app are picked up too.
+    """
+    digest = hashlib.sha256()
+    paginator = get_client("s3").get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=s3_bucket, Prefix="reports/"):
+        for obj in page.get("Contents", []):
+            digest.update(f"{obj['Key']}\t{obj['ETag']}\n".encode())
+    try:
+        digest.update(load_workbook_summary(STUDENTS_WORKBOOK_KEY, s3_bucket)["etag"].encode())
+    except Exception as e:
+        print(f"⚠️ Students workbook not part of the data version: {e}")
+    return digest.hexdigest()
+
+
+def data_version(s3_bucket=BUCKET_NAME):
+    """
+    Token that changes whenever a report or the student roster changes.
+    Recomputed from the listing at most every DATA_VERSION_TTL_SECONDS, and
+    right away after invalidate_responses().
+    """
+    with _lock:
+        if _version["token"] and time.time() - _version["checked_at"] < DATA_VERSION_TTL_SECONDS:
+            return _version["token"]
+        generation = _version["generation"]
+
+    # Concurrent requests after expiry share one check
+    state = single_flight.do(("data_version", s3_bucket, generation), lambda: _listing_state(s3_bucket))
+    token = f"{state[:24]}.{generation}"
+    with _lock:
+        if _version["generation"] == generation:
+            _version.update(token=token, checked_at=time.time())
+    return token
+
+
+def invalidate_responses():
+    """Call after a report or roster upload: the next request sees a new data version."""
+    with _lock:
+        _version["generation"] += 1
+        _version["token"] = None
+
+
+def _render(build):
+    response = make_response(build())
+    return response.get_data(), response.status_code, dict(response.headers)
+
+
+def cached_response(endpoint, build, s3_bucket=BUCKET_NAME):
+    """
+    Serve build() through the response cache for the current data version.
+    Responses carry an ETag; a matching If-None-Match gets a bodyless 304.
+    Concurrent misses for the same endpoint and version share one build()
+    (single flight); only 200 responses are cached.
+    """
+    try:
+        version = data_version(s3_bucket)
+    except Exception as e:
+        print(f"⚠️ Data version unavailable, serving {endpoint} uncached: {e}")
+        version = None
+    etag = hashlib.sha1(f"{endpoint}:{version}".encode()).hexdigest()
+
+    if version and request.if_none_match.contains(etag):
+        response = make_response("", 304)
+    else:
+        cached = response_cache.get((endpoint, version)) if version else None
+        if cached is None:
+            try:
+                cached = single_flight.do((endpoint, version), lambda: _render(build))
+            except TimeoutError as e:
+                return make_response(jsonify({"error": str(e)}), 503)
+            if cached[1] != 200 or not version:
+                return make_response(*cached)
+            response_cache.put((endpoint, version), cached)
+        response = make_response(*cached)
+
+    response.set_etag(etag)
+    # Browsers keep the body but must revalidate each time (cheap 304)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
@@ -0,0 +1,62 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# How long recognition results for a group photo stay reusable (seconds)
+RESULT_CACHE_TTL_SECONDS = int(os.getenv("RESULT_CACHE_TTL_SECONDS", "1800"))
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "512"))
+
+
+def content_hash(data):
+    """Stable key for an uploaded image (sha256 of its raw bytes)."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class TTLCache:
+    """
+    Small thread-safe cache with per-entry expiry and an LRU size bound.
+    Keeps hit/miss counters so the hit rate can be monitored.
+    """
+
+    def __init__(self, ttl_seconds, max_entries):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # {key: (expires_at, value)}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+# Detected faces and match results for repeated group-photo submissions
+recognition_cache = TTLCache(RESULT_CACHE_TTL_SECONDS, RESULT_CACHE_MAX_ENTRIES)
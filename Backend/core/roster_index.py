@@ -0,0 +1,149 @@
+import json
+import os
+import re
+import threading
+from core.aws_clients import get_client
+
+BUCKET_NAME = 'ict-attendance'
+ROSTER_DIR = 'rosters'
+ROSTER_PREFIX = 'manifests/rosters/'
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+_rosters = {}   # {sanitized batch name: roster dict}
+_lock = threading.Lock()
+
+
+def sanitize_for_s3_key(text: str) -> str:
+    """
+    Remove unsafe characters and replace spaces with underscores.
+    The single sanitizer for batch names: S3 prefixes, rosters and face
+    collections must all agree on it.
+    """
+    text = text.strip().replace(" ", "_")
+    text = re.sub(r'[^a-zA-Z0-9_\-]', '', text)
+    return text
+
+
+def _roster_name(batch_name):
+    return sanitize_for_s3_key(batch_name)
+
+
+def _roster_path(batch_name):
+    return os.path.join(ROSTER_DIR, f"{_roster_name(batch_name)}.json")
+
+
+def _roster_key(batch_name):
+    return f"{ROSTER_PREFIX}{_roster_name(batch_name)}.json"
+
+
+def parse_student_image_key(key):
+    """
+    "<batch>/<er_number>_<name>_<index>.<ext>" -> (er_number, name)
+    e.g. "92310133004_Bhargav_Patel_1.jpg" -> ("92310133004", "Bhargav Patel")
+    """
+    filename = os.path.splitext(os.path.basename(key))[0]
+    parts = filename.split('_')
+    if len(parts) < 2:
+        return filename.strip(), filename.strip()
+    if len(parts) > 2 and parts[-1].isdigit():
+        parts = parts[:-1]  # drop the upload index
+    return parts[0].strip(), " ".join(parts[1:]).strip()
+
+
+def _empty_roster():
+    # students: {er_number: {"name", "images": [s3 keys], "etags": {key: etag}, "face_ids": [...]}}
+    return {"version": 0, "students": {}}
+
+
+def rebuild_roster_from_s3(batch_name, s3_bucket=BUCKET_NAME):
+    """One-off S3 listing of the batch prefix, used when no roster exists yet."""
+    roster = _empty_roster()
+    paginator = get_client('s3').get_paginator('list_objects_v2')
+    batch_prefix = f"{_roster_name(batch_name)}/"   # images are uploaded under the sanitized name
+    for page in paginator.paginate(Bucket=s3_bucket, Prefix=batch_prefix):
+        for obj in page.get('Contents', []):
+            key = obj['Key']
+            if key == batch_prefix or not key.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            er_number, name = parse_student_image_key(key)
+            student = roster["students"].setdefault(
+                er_number, {"name": name, "images": [], "etags": {}, "face_ids": []}
+            )
+            student["images"].append(key)
+            student["etags"][key] = obj['ETag']
+    roster["version"] = 1
+    return roster
+
+
+def load_roster(batch_name, s3_bucket=BUCKET_NAME):
+    """
+    Batch roster, loaded once per process: memory, then local file, then the S3
+    copy, and only if none exists a rebuild from the batch's image listing.
+    """
+    with _lock:
+        if _roster_name(batch_name) in _rosters:
+            return _rosters[_roster_name(batch_name)]
+
+    roster = None
+    path = _roster_path(batch_name)
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            roster = json.load(f)
+    else:
+        try:
+            obj = get_client('s3').get_object(Bucket=s3_bucket, Key=_roster_key(batch_name))
+            roster = json.loads(obj['Body'].read())
+        except Exception as e:
+            print(f"⚠️ No roster index for {batch_name}, rebuilding from S3: {e}")
+
+    if roster is None:
+        roster = rebuild_roster_from_s3(batch_name, s3_bucket)
+        with _lock:
+            _rosters.setdefault(_roster_name(batch_name), roster)
+        save_roster(batch_name, s3_bucket)
+
+    with _lock:
+        return _rosters.setdefault(_roster_name(batch_name), roster)
+
+
+def save_roster(batch_name, s3_bucket=BUCKET_NAME):
+    """Write the roster locally and mirror it to S3."""
+    with _lock:
+        data = json.dumps(_rosters.get(_roster_name(batch_name), _empty_roster()), indent=2)
+
+    os.makedirs(ROSTER_DIR, exist_ok=True)
+    path = _roster_path(batch_name)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(data)
+
+    get_client('s3').upload_file(path, s3_bucket, _roster_key(batch_name))
+
+
+def add_student_images(batch_name, er_number, name, images, s3_bucket=BUCKET_NAME):
+    """
+    Record freshly uploaded reference images for a student.
+    images: [{"key": s3_key, "etag": etag, "face_ids": [...]}]
+    """
+    roster = load_roster(batch_name, s3_bucket)
+    with _lock:
+        student = roster["students"].setdefault(
+            er_number, {"name": name, "images": [], "etags": {}, "face_ids": []}
+        )
+        student["name"] = name
+        for image in images:
+            if image["key"] not in student["images"]:
+                student["images"].append(image["key"])
+            student["etags"][image["key"]] = image.get("etag")
+            for face_id in image.get("face_ids", []):
+                if face_id not in student["face_ids"]:
+                    student["face_ids"].append(face_id)
+        roster["version"] += 1
+    save_roster(batch_name, s3_bucket)
+
+
+def roster_students(roster):
+    """[{er_number, name}] - one entry per student."""
+    return [
+        {"er_number": er_number, "name": student["name"]}
+        for er_number, student in roster["students"].items()
+    ]
@@ -0,0 +1,53 @@
+import os
+import threading
+
+# How long a request waits for someone else's in-flight computation (seconds)
+SINGLE_FLIGHT_TIMEOUT_SECONDS = float(os.getenv("SINGLE_FLIGHT_TIMEOUT_SECONDS", "120"))
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical computations: the first caller for a key runs
+    fn, callers arriving while it runs wait for and share its result (or its
+    exception). Nothing is kept once the call finishes.
+    """
+
+    def __init__(self):
+        self._calls = {}   # {key: _Call} for computations in flight
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key, fn, timeout=SINGLE_FLIGHT_TIMEOUT_SECONDS):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if leader:
+            try:
+                call.result = fn()
+            except Exception as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        elif not call.done.wait(timeout):
+            raise TimeoutError(f"Timed out after {timeout}s waiting for in-flight {key!r}")
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+
+single_flight = SingleFlight()
@@ -1,12 +1,15 @@
 import os
-import boto3
+from core.aws_clients import get_client
 from werkzeug.utils import secure_filename
 from openpyxl import Workbook, load_workbook
 from datetime import datetime
-import re
 import sys
-from aws_config import AWS_ACCESS_KEY, AWS_SECRET_KEY, AWS_REGION
 from openpyxl.utils import get_column_letter
+from core.face_collections import (
+    collection_id_for_batch, ensure_batch_backfilled, ensure_collection, forget_collection, record_indexed_faces
+)
+from core.recognizers import get_recognizer
+from core.roster_index import add_student_images, sanitize_for_s3_key
 
 # Constants
 ALLOWED_EXTENSIONS = {'.jpg', '.jpeg', '.png'}
@@ -14,15 +17,6 @@ MAX_FILE_SIZE_MB = 5
 EXCEL_FILE = 'students.xlsx'
 BUCKET_NAME = 'ict-attendance'
 
-# Initialize S3 client
-s3 = boto3.client(
-    's3',
-    region_name=AWS_REGION,
-    aws_access_key_id=AWS_ACCESS_KEY,
-    aws_secret_access_key=AWS_SECRET_KEY
-)
-
-
 def allowed_file(filename):
     """Check allowed file extension."""
     _, ext = os.path.splitext(filename)
@@ -41,16 +35,11 @@ def upload_file_to_s3(bucket_name, file_path, s3_key):
     """Upload a local file to S3 with the object key."""
     try:
         print(f"Uploading to S3 → Bucket: {bucket_name}, Key: {s3_key}")
-        s3.upload_file(file_path, bucket_name, s3_key)
+        get_client('s3').upload_file(file_path, bucket_name, s3_key)
     except Exception as e:
         raise Exception(f"Upload failed: {e}")
 
 
-def sanitize_for_s3_key(text: str) -> str:
-    """Remove unsafe characters and replace spaces with underscores."""
-    text = text.strip().replace(" ", "_")
-    text = re.sub(r'[^a-zA-Z0-9_\-]', '', text)
-    return text
 
 
 
@@ -110,6 +99,7 @@ def upload_multiple_images(batch_name, er_number, name, image_files):
 
     os.makedirs("uploads", exist_ok=True)
     upload_results = []
+    uploaded_images = []  # for the batch roster index
 
     for i, image_file in enumerate(image_files):
         filename = secure_filename(image_file.filename)
@@ -130,11 +120,17 @@ def upload_multiple_images(batch_name, er_number, name, image_files):
 
         try:
             image_file.save(local_path)
-            s3.upload_file(Filename=local_path, Bucket=BUCKET_NAME, Key=s3_key)
+            with open(local_path, "rb") as f:
+                image_bytes = f.read()
+            response = get_client('s3').put_object(Bucket=BUCKET_NAME, Key=s3_key, Body=image_bytes)
             upload_results.append(f"✅ Uploaded: {s3_key}")
 
-            # 👇 Trigger Rekognition auto-index here
-            index_face_to_rekognition(er_number, sanitized_name, s3_key)
+            # 👇 Auto-index in the configured face recognizer (Rekognition by default)
+            face_ids = get_recognizer().index(
+                sanitized_batch_name, er_number, sanitized_name,
+                s3_key=s3_key, image_bytes=image_bytes
+            )
+            uploaded_images.append({"key": s3_key, "etag": response["ETag"], "face_ids": face_ids})
 
         except Exception as e:
             upload_results.append(f"❌ Failed: {s3_key} -> {str(e)}")
@@ -144,6 +140,14 @@ def upload_multiple_images(batch_name, er_number, name, image_files):
 
     sys.dont_write_bytecode = True
 
+    if uploaded_images:
+        try:
+            add_student_images(
+                sanitized_batch_name, er_number, sanitized_name.replace('_', ' '), uploaded_images
+            )
+        except Exception as e:
+            upload_results.append(f"❌ Roster index update failed: {e}")
+
     try:
         # Update Excel and upload to S3
         update_student_excel(batch_name, er_number, name)
@@ -166,9 +170,20 @@ def mark_attendance_s3():
     ]
     return results
 
-def index_face_to_rekognition(er_number, student_name, s3_key, collection_id="students", region="ap-south-1"):
-    rekognition = boto3.client('rekognition', region_name=region)
+def index_face_to_rekognition(er_number, student_name, s3_key, collection_id="students", region="ap-south-1", batch_name=None):
+    """
+    Index a student photo in Rekognition. With batch_name the face goes into that
+    batch's own collection and its FaceId is recorded in the batch manifest.
+    Returns the indexed FaceIds.
+    """
+    rekognition = get_client('rekognition', region)
     external_id = f"{er_number}_{student_name.replace(' ', '_')}"
+    if batch_name:
+        collection_id = collection_id_for_batch(batch_name)
+        ensure_collection(rekognition, collection_id)
+        # Copy students enrolled before per-batch collections over before the
+        # first new face makes the batch collection the one that is searched
+        ensure_batch_backfilled(batch_name, region=region)
     try:
         
         response = rekognition.index_faces(
@@ -179,12 +194,19 @@ def index_face_to_rekognition(er_number, student_name, s3_key, collection_id="st
         )
         if response["FaceRecords"]:
             print(f"✅ Rekognition Indexed: {external_id}")
+            if batch_name:
+                record_indexed_faces(
+                    collection_id, response["FaceRecords"],
+                    er_number, student_name.replace('_', ' '), batch_name, s3_key
+                )
         else:
             print(f"⚠️ No face detected in {s3_key}")
+        return [record["Face"]["FaceId"] for record in response["FaceRecords"]]
     except rekognition.exceptions.ResourceNotFoundException:
-        rekognition.create_collection(CollectionId=collection_id)
-        print(f"✅ Rekognition Collection '{collection_id}' created")
-        index_face_to_rekognition(er_number, student_name, s3_key, collection_id, region)
+        # Collection deleted since it was created: recreate it, retry with the same arguments
+        forget_collection(collection_id)
+        ensure_collection(rekognition, collection_id)
+        return index_face_to_rekognition(er_number, student_name, s3_key, collection_id, region, batch_name)
 
 
 if __name__ == '__main__':
@@ -2,8 +2,7 @@ import os
 import sys
 import io
 import csv
-from datetime import datetime, timedelta, timezone
-import boto3
+from datetime import datetime, timedelta
 from flask import jsonify
 # from core.list_s3_reports import list_s3_reports
 from dotenv import load_dotenv
@@ -12,6 +11,7 @@ from flask import (
     session, send_file, jsonify
 )
 from flask_cors import CORS
+from werkzeug.utils import secure_filename
 from flask import send_from_directory
 
 sys.dont_write_bytecode = True
@@ -20,8 +20,6 @@ sys.dont_write_bytecode = True
 load_dotenv()
 
 AWS_REGION = os.getenv("AWS_REGION", "ap-south-1")
-AWS_ACCESS_KEY = os.getenv("AWS_ACCESS_KEY")
-AWS_SECRET_KEY = os.getenv("AWS_SECRET_KEY")
 FLASK_SECRET_KEY = os.getenv("SECRET_KEY", "your_default_secret")
 BUCKET_NAME = os.getenv("BUCKET_NAME", "ict-attendance")
 FLASK_SECRET_KEY = os.getenv("SECRET_KEY", "your_default_secret")
@@ -40,24 +38,15 @@ app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
 # Enable CORS for React frontend
 CORS(app, supports_credentials=True, resources={r"/*": {"origins": "*"}})
 
-# Initialize AWS clients
-rekognition_client = boto3.client(
-    "rekognition",
-    region_name=AWS_REGION,
-    aws_access_key_id=AWS_ACCESS_KEY,
-    aws_secret_access_key=AWS_SECRET_KEY
-)
-s3_client = boto3.client(
-    "s3",
-    region_name=AWS_REGION,
-    aws_access_key_id=AWS_ACCESS_KEY,
-    aws_secret_access_key=AWS_SECRET_KEY
-)
-
 # Import core functions
+from core.aws_clients import get_client
 from core.upload_to_s3 import upload_multiple_images
 from core.update_excel import sync_students_to_excel
-from core.mark_batch_attendance import mark_batch_attendance_s3
+from core.mark_batch_attendance import mark_batch_attendance_s3, ATTENDANCE_REPORTS_DIR
+from core.result_cache import recognition_cache
+from core.master_roster import student_count
+from core.reports_service import invalidate_report_rows, load_report_rows, query_reports
+from core.response_cache import cached_response, invalidate_responses
 
 USER = {'username': 'admin', 'password': 'admin'}
 
@@ -154,6 +143,7 @@ def take_attendance():
         batch_name = request.form.get('batch_name')
         subject_name = request.form.get('subject_name')
         lab_name = request.form.get('lab_name', '')
+        mode = request.form.get('mode', 'compare')  # 'compare' or 'collection'
 
         group_images = request.files.getlist('class_images')
         if not batch_name or not subject_name or not group_images:
@@ -164,7 +154,8 @@ def take_attendance():
             batch_name=batch_name,
             class_name=lab_name,
             subject=subject_name,
-            group_image_files=group_images
+            group_image_files=group_images,
+            mode=mode
         )
         return jsonify({
             "success": True,
@@ -176,10 +167,16 @@ def take_attendance():
         return jsonify({"success": False, "error": str(e)}), 500
 
 
+# Hit rate of the group-photo recognition cache (for monitoring)
+@app.route('/take_attendance/cache_stats', methods=['GET'])
+def take_attendance_cache_stats():
+    return jsonify(recognition_cache.stats())
+
+
 # Serve saved attendance reports
 @app.route('/attendance_reports/<path:filename>')
 def download_report(filename):
-    return send_from_directory("attendance_reports", filename, as_attachment=True)
+    return send_from_directory(ATTENDANCE_REPORTS_DIR, filename, as_attachment=True)
 
 
 # ---------------- Batch Upload Placeholder ---------------- #
@@ -230,12 +227,14 @@ def download_attendance():
 
     try:
         # ✅ Upload CSV to S3 with public-read ACL
-        s3_client.upload_fileobj(
+        get_client("s3").upload_fileobj(
             csv_bytes,
             "ict-attendance",
             s3_key,
             ExtraArgs={'ACL': 'public-read'}   # 👈 makes file public
         )
+        invalidate_report_rows()
+        invalidate_responses()
 
         # ✅ Permanent Public URL
         public_url = f"https://ict-attendance.s3.ap-south-1.amazonaws.com/{s3_key}"
@@ -268,50 +267,38 @@ def upload_excel():
     batch_name = request.form.get('batch_name', 'default_batch')
     filename = secure_filename(file.filename)
 
-    s3 = boto3.client('s3')
-    s3.upload_fileobj(file, BUCKET_NAME, f"{batch_name}/{filename}")
+    get_client("s3").upload_fileobj(file, BUCKET_NAME, f"{batch_name}/{filename}")
 
     return jsonify({"success": True, "message": "File uploaded to S3"})
 
 
 @app.route("/api/reports", methods=["GET"])
 def list_reports():
+    # Cached per data version; unchanged listings get a 304
+    return cached_response("api_reports", build_report_list, BUCKET_NAME)
+
+
+def build_report_list():
     try:
-        response = s3_client.list_objects_v2(Bucket=BUCKET_NAME, Prefix="reports/")
-
-        reports = []
-        for obj in response.get("Contents", []):
-            key = obj["Key"]
-
-            # only Excel reports
-            if not (key.endswith(".xlsx") or key.endswith(".csv")):
-                continue
-
-            # Download Excel file from S3
-            s3_obj = s3_client.get_object(Bucket=BUCKET_NAME, Key=key)
-            body = s3_obj["Body"].read()
-
-            # Parse Excel
-            import pandas as pd, io
-            df = pd.read_excel(io.BytesIO(body))
-
-            records_count = len(df)
-            students = []
-            if "Name" in df.columns:  # optional: extract student names
-                students = df["Name"].dropna().tolist()
-
-            reports.append({
-                "id": key,
-                "fileName": os.path.basename(key),
-                "batch": "-",   # TODO: parse from filename if needed
-                "subject": "-",
-                "date": obj["LastModified"].astimezone(timezone.utc).isoformat(),
-                "size": f"{obj['Size']/1024:.1f} KB",
-                "records": records_count,
-                "status": "ready",
-                "students": students,
-                "url": f"https://{BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com/{key}"
-            })
+        # Paginated listing + ETag report index: only new or changed reports are parsed
+        rows, _ = load_report_rows(max_age=0)
+
+        reports = [
+            {
+                "id": row["id"],
+                "fileName": row["fileName"],
+                "batch": row["batch"],
+                "subject": row["subject"],
+                "date": row["uploadedAt"],
+                "size": row["size"],
+                "records": row["records"],
+                "status": row["status"],
+                "students": row["students"],
+                "url": row["url"]
+            }
+            # Listing (key) order, as before
+            for row in sorted(rows, key=lambda row: row["id"])
+        ]
 
         return jsonify(reports)
 
@@ -319,18 +306,37 @@ def list_reports():
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/students/count", methods=["GET"])
-def students_count():
+@app.route("/api/reports/query", methods=["GET"])
+def query_reports_api():
+    """
+    Filtered, paginated reports:
+    ?batch=&section=&subject=&from=YYYY-MM-DD&to=YYYY-MM-DD&cursor=&limit=&fields=id,students,...
+    """
     try:
-        # Example: read students Excel file from S3
-        s3_obj = s3_client.get_object(Bucket=BUCKET_NAME, Key="students.xlsx")
-        body = s3_obj["Body"].read()
+        args = request.args
+        fields = [f.strip() for f in args.get("fields", "").split(",") if f.strip()]
+        result = query_reports(
+            batch=args.get("batch"),
+            section=args.get("section"),
+            subject=args.get("subject"),
+            date_from=args.get("from"),
+            date_to=args.get("to"),
+            cursor=args.get("cursor"),
+            limit=args.get("limit", 50),
+            fields=fields or None,
+        )
+        return jsonify(result)
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": f"Invalid query: {e}"}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
-        import pandas as pd, io
-        df = pd.read_excel(io.BytesIO(body))
 
-        # Count rows (students)
-        count = len(df)
+@app.route("/students/count", methods=["GET"])
+def students_count():
+    try:
+        # Rows of the students Excel file in S3 (cached, revalidated by ETag)
+        count = student_count(BUCKET_NAME)
 
         return jsonify({"count": count})
     except Exception as e:
@@ -347,6 +353,10 @@ from core.generate_attendance_charts import generate_overall_attendance
 def dashboard():
     if not session.get('logged_in'):
         return redirect(url_for('login'))
+    return cached_response("dashboard", render_dashboard, BUCKET_NAME)
+
+
+def render_dashboard():
     try:
         charts = generate_overall_attendance()
 
@@ -358,12 +368,15 @@ def dashboard():
             subject_pie_chart=charts.get("subject_pie_chart", None)
         )
     except Exception as e:
-        return render_template("dashboard.html", error=str(e))
+        # Non-200, so the error page is never kept by the response cache
+        return render_template("dashboard.html", error=str(e)), 500
 
 
 from core.overview import dashboard_bp
+from core.attendance_jobs import jobs_bp
 # Register Blueprints
 app.register_blueprint(dashboard_bp)
+app.register_blueprint(jobs_bp)
 
 
 # if __name__ == '__main__':
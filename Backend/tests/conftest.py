@@ -0,0 +1,62 @@
+import os
+import sys
+
+import pytest
+
+# Fake credentials before any boto3 client exists; moto intercepts every call
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+os.environ.setdefault("AWS_DEFAULT_REGION", "ap-south-1")
+os.environ["AWS_ACCESS_KEY"] = os.environ["AWS_ACCESS_KEY_ID"]
+os.environ["AWS_SECRET_KEY"] = os.environ["AWS_SECRET_ACCESS_KEY"]
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BUCKET_NAME = "ict-attendance"
+
+# Per-process caches, reset between tests: {module: {attribute: factory}}
+_MODULE_STATE = {
+    "core.aws_clients": {"_clients": dict, "_session": lambda: None},
+    "core.face_collections": {"_manifests": dict, "_known_collections": set, "_backfilled": set},
+    "core.roster_index": {"_rosters": dict},
+    "core.master_roster": {"_workbooks": dict},
+    "core.report_index": {"_index": lambda: None},
+    "core.attendance_rollups": {"_store": lambda: None},
+    "core.recognizers": {"_recognizers": dict},
+    "core.report_ingest": {"_failed": dict},
+    "core.reports_service": {"_report_rows": lambda: {"rows": None, "sort_keys": [], "groups": {}, "built_at": 0.0}},
+    "core.response_cache": {"_version": lambda: {"token": None, "checked_at": 0.0, "generation": 0}},
+}
+
+
+@pytest.fixture(autouse=True)
+def isolated_state(tmp_path, monkeypatch):
+    """Every test runs in its own directory with empty module caches."""
+    monkeypatch.chdir(tmp_path)
+    for module_name, attributes in _MODULE_STATE.items():
+        module = sys.modules.get(module_name)
+        if module is None:
+            continue
+        for attribute, factory in attributes.items():
+            monkeypatch.setattr(module, attribute, factory())
+    for module_name, attribute in (("core.response_cache", "response_cache"),
+                                   ("core.result_cache", "recognition_cache")):
+        module = sys.modules.get(module_name)
+        if module is not None:
+            getattr(module, attribute)._entries.clear()
+    yield
+
+
+@pytest.fixture
+def s3():
+    """moto-backed S3 with the attendance bucket created."""
+    from moto import mock_aws
+    from core.aws_clients import get_client
+
+    with mock_aws():
+        client = get_client("s3")
+        client.create_bucket(
+            Bucket=BUCKET_NAME,
+            CreateBucketConfiguration={"LocationConstraint": "ap-south-1"},
+        )
+        yield client
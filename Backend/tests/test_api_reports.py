@@ -0,0 +1,16 @@
+def test_api_reports_keeps_listing_order(s3):
+    import main
+
+    # Key order differs from report-date order
+    for name in ("20250805_090000_2023_A_OS.csv", "20250801_090000_2024_B_DBMS.csv", "legacy.csv"):
+        s3.put_object(Bucket="ict-attendance", Key=f"reports/{name}", Body=b"Name\nAsha\n")
+
+    response = main.app.test_client().get("/api/reports")
+
+    assert response.status_code == 200
+    reports = response.get_json()
+    assert [report["fileName"] for report in reports] == [
+        "20250801_090000_2024_B_DBMS.csv", "20250805_090000_2023_A_OS.csv", "legacy.csv"
+    ]
+    assert (reports[0]["batch"], reports[0]["subject"]) == ("2024", "Database Management Systems")
+    assert reports[0]["students"] == ["Asha"]
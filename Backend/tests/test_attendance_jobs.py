@@ -0,0 +1,92 @@
+import io
+
+import pytest
+from flask import Flask
+
+from core import attendance_jobs
+
+
+class IdleExecutor:
+    """Accepts jobs without running them, so they stay pending."""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, fn, *args):
+        self.submitted.append(args)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(attendance_jobs, "_executor", IdleExecutor())
+    monkeypatch.setattr(attendance_jobs, "_jobs", {})
+    monkeypatch.setattr(attendance_jobs, "_job_events", {})
+    monkeypatch.setattr(attendance_jobs, "ATTENDANCE_MAX_PENDING_JOBS", 2)
+    app = Flask(__name__)
+    app.register_blueprint(attendance_jobs.jobs_bp)
+    return app.test_client()
+
+
+def _post(client):
+    return client.post("/take_attendance/jobs", data={
+        "batch_name": "ICT A",
+        "subject_name": "DBMS",
+        "class_images": (io.BytesIO(b"jpeg"), "class.jpg"),
+    }, content_type="multipart/form-data")
+
+
+def test_submissions_beyond_the_cap_get_503(client):
+    assert _post(client).status_code == 202
+    assert _post(client).status_code == 202
+
+    response = _post(client)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(attendance_jobs.JOB_QUEUE_RETRY_AFTER_SECONDS)
+    assert len(attendance_jobs._executor.submitted) == 2
+
+
+def test_finished_jobs_free_their_slot(client):
+    job_id = _post(client).get_json()["job_id"]
+    _post(client)
+    attendance_jobs._update_job(job_id, status="done", finishedAt=1.0)
+
+    assert _post(client).status_code == 202
+
+
+def test_submit_attendance_job_raises_when_full(client):
+    attendance_jobs.submit_attendance_job(batch_name="ICT A")
+    attendance_jobs.submit_attendance_job(batch_name="ICT A")
+    with pytest.raises(attendance_jobs.JobQueueFull):
+        attendance_jobs.submit_attendance_job(batch_name="ICT A")
+
+
+class InlineExecutor:
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+def test_stream_pushes_present_students_then_done(monkeypatch):
+    def fake_attendance(on_progress, **kwargs):
+        student = {"er_number": "92310133004", "name": "Bhargav Patel"}
+        on_progress({"event": "started", "students": 2})
+        on_progress({"event": "compared", "key": "k", "matched": True})
+        on_progress({"event": "present", "student": student})
+        return [student], [{"er_number": "92310133005", "name": "Riya Shah"}], "https://report"
+
+    monkeypatch.setattr(attendance_jobs, "_executor", InlineExecutor())
+    monkeypatch.setattr(attendance_jobs, "_jobs", {})
+    monkeypatch.setattr(attendance_jobs, "_job_events", {})
+    monkeypatch.setattr(attendance_jobs, "mark_batch_attendance_s3", fake_attendance)
+    app = Flask(__name__)
+    app.register_blueprint(attendance_jobs.jobs_bp)
+
+    response = app.test_client().post("/take_attendance/stream", data={
+        "batch_name": "ICT A",
+        "subject_name": "DBMS",
+        "class_images": (io.BytesIO(b"jpeg"), "class.jpg"),
+    }, content_type="multipart/form-data")
+
+    assert response.mimetype == "text/event-stream"
+    events = [block.split("\n")[0] for block in response.get_data(as_text=True).strip().split("\n\n")]
+    assert events == ["event: job", "event: started", "event: present", "event: done"]
+    assert '"report_url": "https://report"' in response.get_data(as_text=True)
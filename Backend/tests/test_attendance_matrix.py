@@ -0,0 +1,39 @@
+from core.attendance_matrix import AttendanceMatrix
+from core.reports_service import calculate_attendance_percentages
+
+
+def test_matrix_counts_and_percentages():
+    matrix = AttendanceMatrix(["Asha", "Bhavin", "Chirag", "Asha"], [["Asha", "Bhavin"], ["Asha", "Zoya"], []])
+
+    assert matrix.students == ["Asha", "Bhavin", "Chirag"]
+    assert matrix.present_counts().tolist() == [2, 1, 0]
+    assert matrix.percentages().tolist() == [66.7, 33.3, 0.0]
+    assert matrix.session_map(1) == {"Asha": "Present", "Bhavin": "Absent", "Chirag": "Absent"}
+
+
+def test_session_index_and_student_history():
+    roster = [f"S{i:03d}" for i in range(20)]   # spans several packed bytes
+    matrix = AttendanceMatrix(
+        roster, [["S000", "S013"], ["S013"], ["S019"]],
+        session_ids=["r1.xlsx", "r2.xlsx", "r3.xlsx"],
+    )
+
+    assert matrix.session_index == {"r1.xlsx": 0, "r2.xlsx": 1, "r3.xlsx": 2}
+    assert matrix.session_map(matrix.session_index["r2.xlsx"])["S013"] == "Present"
+    assert matrix.student_history("S013").tolist() == [True, True, False]
+    assert matrix.student_history("S019").tolist() == [False, False, True]
+    assert matrix.student_history("S001").tolist() == [False, False, False]
+    assert matrix.student_history("S013").tolist() == matrix.presence()[:, 13].tolist()
+
+
+def test_calculate_attendance_percentages_per_section():
+    reports = {"2023": {"A": [{"students": ["Asha", "Bhavin"]}, {"students": ["Asha"]}]}}
+    master = {"2023": {"A": ["Asha", "Bhavin"]}}
+
+    results = calculate_attendance_percentages(reports, master)
+
+    assert results[("2023", "A")] == {
+        "Asha": {"present": 2, "total": 2, "percentage": 100.0},
+        "Bhavin": {"present": 1, "total": 2, "percentage": 50.0},
+    }
+    assert reports["2023"]["A"][1]["attendanceMap"] == {"Asha": "Present", "Bhavin": "Absent"}
@@ -0,0 +1,98 @@
+import io
+
+import pandas as pd
+
+from core import attendance_rollups
+from core.attendance_rollups import _empty_store, _fold, load_attendance_history, rebuild_rollups
+from core.report_ingest import iter_report_objects
+
+REPORTS = {
+    "reports/20250801_090000_2023_A_OS.xlsx": [
+        ("92310133004", "Bhargav Patel", "01-08-2025", "OS", "Present"),
+        ("92310133005", "Riya Shah", "01-08-2025", "OS", "Absent"),
+    ],
+    "reports/20250801_100000_2023_A_OS.xlsx": [
+        ("92310133004", "Bhargav Patel", "01-08-2025", "OS", "Absent"),
+        ("92310133005", "Riya Shah", "01-08-2025", "OS", "Present"),
+    ],
+    "reports/20250802_090000_2023_A_DBMS.xlsx": [
+        ("92310133004", "Bhargav Patel", "02-08-2025", "DBMS", "Present"),
+    ],
+}
+
+
+def _frame(rows):
+    return pd.DataFrame(rows, columns=["ER Number", "Student Name", "Date", "Subject", "Status"]).assign(
+        Batch="2023", Class="A"
+    )
+
+
+def _upload(s3):
+    for key, rows in REPORTS.items():
+        buffer = io.BytesIO()
+        _frame(rows).to_excel(buffer, index=False)
+        s3.put_object(Bucket="ict-attendance", Key=key, Body=buffer.getvalue())
+    s3.put_object(Bucket="ict-attendance", Key="reports/20250803_090000_2023_A_CN.xlsx", Body=b"broken")
+
+
+def test_history_is_one_categorical_frame(s3):
+    _upload(s3)
+    history, etags = load_attendance_history(list(iter_report_objects("ict-attendance", extensions=(".xlsx",))))
+
+    assert len(history) == 5
+    assert list(history.columns) == attendance_rollups.HISTORY_COLUMNS
+    assert str(history["subject"].dtype) == "category"
+    assert set(history["status"]) == {"present", "absent"}
+    assert len(etags) == 3   # the broken report is skipped by the reader
+
+
+def test_rebuild_matches_incremental_folds(s3):
+    _upload(s3)
+    rebuilt = rebuild_rollups()
+
+    folded = _empty_store()
+    for key, rows in REPORTS.items():
+        _fold(folded, key, _frame(rows))
+
+    assert rebuilt["rows"] == folded["rows"]
+    assert rebuilt["names"] == folded["names"]
+    os_row = rebuilt["rows"]["2023|A|OS|2025-08-01"]
+    assert os_row["reports"] == 2
+    assert os_row["present"] == ["92310133004", "92310133005"] and os_row["absent"] == []
+
+
+def _reports_listing():
+    return list(iter_report_objects("ict-attendance", extensions=(".xlsx",)))
+
+
+def test_sync_folds_new_reports_and_rebuilds_after_a_delete(s3, monkeypatch):
+    _upload(s3)
+    store = attendance_rollups.sync_rollups(_reports_listing())
+    assert store["rows"]["2023|A|DBMS|2025-08-02"]["present"] == ["92310133004"]
+
+    rebuilds = []
+    real_rebuild = attendance_rollups.rebuild_rollups
+    monkeypatch.setattr(attendance_rollups, "rebuild_rollups", lambda *args: rebuilds.append(1) or real_rebuild(*args))
+
+    # Unchanged listing: nothing re-read, no rebuild
+    assert attendance_rollups.sync_rollups(_reports_listing()) is store
+    assert rebuilds == []
+
+    s3.delete_object(Bucket="ict-attendance", Key="reports/20250802_090000_2023_A_DBMS.xlsx")
+    store = attendance_rollups.sync_rollups(_reports_listing())
+    assert rebuilds == [1]
+    assert "2023|A|DBMS|2025-08-02" not in store["rows"]
+
+
+def test_summarize_rollups(s3):
+    _upload(s3)
+    summary = attendance_rollups.summarize_rollups(rebuild_rollups())
+
+    assert summary["subject_counts"] == {"DBMS": 1, "OS": 2}
+    assert summary["daily_trend_data"] == [
+        {"date": "2025-08-01", "attendance": 2}, {"date": "2025-08-02", "attendance": 1},
+    ]
+    by_er = {student["er_number"]: student for student in summary["students"]}
+    assert by_er["92310133004"]["present_count"] == 2
+    assert by_er["92310133005"]["attendance_percentage"] == 50.0
+    assert summary["avg_attendance_pct"] == 75.0
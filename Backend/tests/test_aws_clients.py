@@ -0,0 +1,27 @@
+import threading
+
+from core import aws_clients
+from core.aws_clients import get_client
+
+
+def test_clients_are_shared_per_service_and_region(s3):
+    assert get_client("s3") is s3
+    assert get_client("s3", aws_clients.AWS_REGION) is s3
+    assert get_client("s3", "us-east-1") is not s3
+    assert get_client("rekognition") is get_client("rekognition")
+
+
+def test_concurrent_first_use_creates_one_client(s3):
+    seen = []
+    threads = [threading.Thread(target=lambda: seen.append(get_client("sts"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(client) for client in seen}) == 1
+
+
+def test_clients_use_the_pooled_retry_config(s3):
+    config = get_client("s3").meta.config
+    assert config.max_pool_connections == aws_clients.AWS_MAX_POOL_CONNECTIONS
+    assert config.retries["mode"] == aws_clients.AWS_RETRY_MODE
@@ -0,0 +1,46 @@
+import io
+
+import pandas as pd
+
+from core import generate_attendance_charts
+from core.chart_cache import ChartCache, report_fingerprint
+
+
+def test_fingerprint_ignores_listing_order_but_not_etags():
+    a = {"Key": "reports/a.xlsx", "ETag": '"1"'}
+    b = {"Key": "reports/b.xlsx", "ETag": '"2"'}
+    assert report_fingerprint([a, b]) == report_fingerprint([b, a])
+    assert report_fingerprint([a, b]) != report_fingerprint([a, dict(b, ETag='"3"')])
+
+
+def test_chart_cache_is_an_lru_persisted_to_disk(tmp_path):
+    cache = ChartCache(2, str(tmp_path / "charts"))
+    cache.put("pie", "fp1", b"one")
+    cache.put("pie", "fp2", b"two")
+    cache.get("pie", "fp1")
+    cache.put("pie", "fp3", b"three")
+    assert list(cache._entries) == [("pie", "fp1"), ("pie", "fp3")]
+
+    # Evicted from memory, still served from disk (e.g. by another worker)
+    assert ChartCache(2, str(tmp_path / "charts")).get("pie", "fp2") == b"two"
+    assert cache.get("pie", "missing") is None
+
+
+def test_dashboard_chart_rendered_once_per_report_set(s3, monkeypatch):
+    buffer = io.BytesIO()
+    pd.DataFrame({
+        "ER Number": ["92310133004"], "Student Name": ["Bhargav Patel"], "Date": ["01-08-2025"],
+        "Subject": ["OS"], "Status": ["Present"],
+    }).to_excel(buffer, index=False)
+    s3.put_object(Bucket="ict-attendance", Key="reports/20250801_090000_2023_A_OS.xlsx", Body=buffer.getvalue())
+
+    renders = []
+    monkeypatch.setattr(generate_attendance_charts, "BUCKET_NAME", "ict-attendance")
+    monkeypatch.setattr(generate_attendance_charts, "chart_cache", ChartCache(4))
+    monkeypatch.setattr(generate_attendance_charts, "render_subject_pie_chart", lambda counts: renders.append(counts) or b"png")
+
+    first = generate_attendance_charts.generate_overall_attendance()
+    second = generate_attendance_charts.generate_overall_attendance()
+
+    assert renders == [{"OS": 1}]
+    assert first["subject_pie_chart"] == second["subject_pie_chart"]
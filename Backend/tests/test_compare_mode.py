@@ -0,0 +1,85 @@
+import io
+
+import pytest
+from PIL import Image
+
+from core import aws_clients
+from core.mark_batch_attendance import mark_batch_attendance_s3
+from core.result_cache import recognition_cache
+
+REFERENCE_IMAGES = {
+    "ICT_A/92310133004_Bhargav_Patel_1.jpg": b"bhargav-side-profile",
+    "ICT_A/92310133004_Bhargav_Patel_2.jpg": b"bhargav-front",
+    "ICT_A/92310133005_Riya_Shah_1.jpg": b"riya",
+    "ICT_A/92310133006_Kiran_Rao_1.jpg": b"kiran",
+}
+
+
+class StubRekognition:
+    """compare_faces matches the reference images listed for each group photo colour."""
+
+    def __init__(self, matches):
+        self.matches = matches   # {group photo bytes: {reference bytes}}
+        self.compared = []
+
+    def detect_faces(self, Image, Attributes):
+        return {"FaceDetails": [{"BoundingBox": {}}]}
+
+    def compare_faces(self, SourceImage, TargetImage, SimilarityThreshold):
+        self.compared.append(SourceImage["Bytes"])
+        matched = SourceImage["Bytes"] in self.matches[TargetImage["Bytes"]]
+        return {"FaceMatches": [{"Similarity": 99.0}] if matched else []}
+
+
+def _photo(colour):
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), colour).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def classroom(s3, monkeypatch):
+    for key, body in REFERENCE_IMAGES.items():
+        s3.put_object(Bucket="ict-attendance", Key=key, Body=body)
+    monkeypatch.setattr("core.mark_batch_attendance.save_attendance_to_excel", lambda *args: (None, "url"))
+    morning, afternoon = _photo("white"), _photo("black")
+    stub = StubRekognition({
+        morning: {b"bhargav-front", b"riya"},
+        afternoon: {b"riya", b"kiran"},
+    })
+    aws_clients._clients[("rekognition", "ap-south-1")] = stub
+    return stub, [morning, afternoon]
+
+
+def _run(photos, **kwargs):
+    recognition_cache._entries.clear()
+    present, absent, _ = mark_batch_attendance_s3(
+        "ICT A", "Lab 1", "DBMS", [io.BytesIO(photo) for photo in photos], **kwargs
+    )
+    return [s["er_number"] for s in present], [s["er_number"] for s in absent]
+
+
+def test_parallel_run_matches_sequential_run(classroom):
+    stub, photos = classroom
+
+    sequential = _run(photos, max_workers=1)
+    sequential_calls = len(stub.compared)
+    stub.compared.clear()
+    parallel = _run(photos, max_workers=4)
+
+    assert parallel == sequential == (["92310133004", "92310133005", "92310133006"], [])
+    assert len(stub.compared) == sequential_calls
+
+
+def test_representative_strategy_skips_students_already_present(classroom):
+    stub, photos = classroom
+
+    present, absent = _run(photos, max_workers=1)
+    assert (present, absent) == (["92310133004", "92310133005", "92310133006"], [])
+    # Photo 1: Bhargav's second image only after the first missed, everyone once.
+    # Photo 2: only Kiran, the one student still absent.
+    assert stub.compared == [b"bhargav-side-profile", b"bhargav-front", b"riya", b"kiran", b"kiran"]
+
+    stub.compared.clear()
+    _run(photos, max_workers=1, strategy="exhaustive")
+    assert len(stub.compared) == len(REFERENCE_IMAGES) * len(photos)
@@ -0,0 +1,124 @@
+from core import aws_clients, face_collections, roster_index, upload_to_s3
+from core.recognizers import RekognitionRecognizer
+
+
+class StubRekognition:
+    """Records index_faces calls; every image yields one face."""
+
+    class exceptions:
+        class ResourceAlreadyExistsException(Exception):
+            pass
+
+        class ResourceNotFoundException(Exception):
+            pass
+
+    def __init__(self):
+        self.collections = set()
+        self.indexed = []
+
+    def create_collection(self, CollectionId):
+        self.collections.add(CollectionId)
+
+    def index_faces(self, CollectionId, Image, ExternalImageId, DetectionAttributes):
+        self.indexed.append((CollectionId, Image["S3Object"]["Name"], ExternalImageId))
+        return {"FaceRecords": [{"Face": {"FaceId": f"face-{len(self.indexed)}"}}]}
+
+
+def _use_stub(stub):
+    aws_clients._clients[("rekognition", "ap-south-1")] = stub
+
+
+def test_batch_name_sanitized_the_same_everywhere():
+    batch = "B.Tech ICT 2023"
+    assert upload_to_s3.sanitize_for_s3_key is roster_index.sanitize_for_s3_key
+    assert roster_index._roster_name(batch) == "BTech_ICT_2023"
+    assert face_collections.collection_id_for_batch(batch) == "students-BTech_ICT_2023"
+
+
+def test_backfill_indexes_roster_images_once(s3):
+    for key in ("BTech_ICT_2023/92310133004_Bhargav_Patel_1.jpg",
+                "BTech_ICT_2023/92310133005_Riya_Shah_1.jpg"):
+        s3.put_object(Bucket="ict-attendance", Key=key, Body=b"jpeg")
+    stub = StubRekognition()
+    _use_stub(stub)
+
+    assert face_collections.backfill_batch_collection("B.Tech ICT 2023") == 2
+    assert stub.collections == {"students-BTech_ICT_2023"}
+    assert {external for _, _, external in stub.indexed} == {
+        "92310133004_Bhargav_Patel", "92310133005_Riya_Shah"
+    }
+    manifest = face_collections.load_manifest("students-BTech_ICT_2023")
+    assert {face["er_number"] for face in manifest.values()} == {"92310133004", "92310133005"}
+
+    # Images already in the manifest are not indexed again
+    assert face_collections.backfill_batch_collection("B.Tech ICT 2023") == 0
+    assert len(stub.indexed) == 2
+
+
+def test_search_falls_back_to_shared_collection_until_backfilled(s3):
+    stub = StubRekognition()
+    _use_stub(stub)
+    recognizer = RekognitionRecognizer()
+
+    assert recognizer.collection_for("ICT A") == face_collections.SHARED_COLLECTION_ID
+
+    face_collections.record_indexed_faces(
+        "students-ICT_A", [{"Face": {"FaceId": "f1"}}],
+        "92310133004", "Bhargav Patel", "ICT A", "ICT_A/92310133004_Bhargav_Patel_1.jpg"
+    )
+    assert recognizer.collection_for("ICT A") == "students-ICT_A"
+
+
+def test_first_batch_enrolment_backfills_earlier_students(s3):
+    # Students enrolled before per-batch collections: images and roster only
+    for key in ("ICT_A/92310133004_Bhargav_Patel_1.jpg", "ICT_A/92310133005_Riya_Shah_1.jpg"):
+        s3.put_object(Bucket="ict-attendance", Key=key, Body=b"jpeg")
+    roster_index.load_roster("ICT A")
+    stub = StubRekognition()
+    _use_stub(stub)
+
+    upload_to_s3.index_face_to_rekognition(
+        "92310133006", "Meet_Joshi", "ICT_A/92310133006_Meet_Joshi_1.jpg", batch_name="ICT_A"
+    )
+
+    assert RekognitionRecognizer().collection_for("ICT A") == "students-ICT_A"
+    manifest = face_collections.load_manifest("students-ICT_A")
+    assert {face["er_number"] for face in manifest.values()} == {"92310133004", "92310133005", "92310133006"}
+
+
+def test_search_backfills_roster_images_missing_from_the_manifest(s3):
+    for key in ("ICT_A/92310133004_Bhargav_Patel_1.jpg", "ICT_A/92310133005_Riya_Shah_1.jpg"):
+        s3.put_object(Bucket="ict-attendance", Key=key, Body=b"jpeg")
+    face_collections.record_indexed_faces(
+        "students-ICT_A", [{"Face": {"FaceId": "f1"}}],
+        "92310133004", "Bhargav Patel", "ICT A", "ICT_A/92310133004_Bhargav_Patel_1.jpg"
+    )
+    stub = StubRekognition()
+    _use_stub(stub)
+
+    recognizer = RekognitionRecognizer()
+    assert recognizer.collection_for("ICT A") == "students-ICT_A"
+    assert [key for _, key, _ in stub.indexed] == ["ICT_A/92310133005_Riya_Shah_1.jpg"]
+
+    # Checked once per process, not on every search
+    recognizer.collection_for("ICT A")
+    assert len(stub.indexed) == 1
+
+
+def test_index_retry_after_deleted_collection_keeps_the_batch(s3):
+    class DeletedOnce(StubRekognition):
+        def index_faces(self, CollectionId, **kwargs):
+            if CollectionId not in self.collections:
+                raise self.exceptions.ResourceNotFoundException(CollectionId)
+            return super().index_faces(CollectionId, **kwargs)
+
+    stub = DeletedOnce()
+    _use_stub(stub)
+    face_collections._known_collections.add("students-ICT_A")   # seen earlier, since deleted
+
+    face_ids = upload_to_s3.index_face_to_rekognition(
+        "92310133004", "Bhargav_Patel", "ICT_A/92310133004_Bhargav_Patel_1.jpg", batch_name="ICT_A"
+    )
+
+    assert stub.collections == {"students-ICT_A"}
+    assert face_collections.resolve_face("students-ICT_A", face_ids[0])["name"] == "Bhargav Patel"
@@ -0,0 +1,40 @@
+import io
+
+from PIL import Image
+
+from core.face_preprocess import crop_faces_from_group, prepare_group_image
+
+
+def _encode(image, format="PNG", **params):
+    buffer = io.BytesIO()
+    image.save(buffer, format=format, **params)
+    return buffer.getvalue()
+
+
+def test_small_photos_pass_through_unchanged():
+    photo = _encode(Image.new("RGB", (640, 480), "white"))
+    assert prepare_group_image(photo) is photo
+
+
+def test_large_photos_are_downscaled_and_rotated_to_jpeg():
+    exif = Image.Exif()
+    exif[0x0112] = 6   # rotated 90 degrees clockwise
+    photo = _encode(Image.new("RGB", (4000, 3000), "white"), "JPEG", exif=exif)
+
+    prepared = Image.open(io.BytesIO(prepare_group_image(photo, max_dimension=1000)))
+    assert prepared.format == "JPEG"
+    assert prepared.size == (750, 1000)
+
+
+def test_faces_are_cropped_with_padding_and_tiny_faces_upscaled():
+    photo = _encode(Image.new("RGB", (1000, 1000), "white"))
+    faces = [
+        {"BoundingBox": {"Left": 0.2, "Top": 0.2, "Width": 0.2, "Height": 0.2}},
+        {"BoundingBox": {"Left": 0.9, "Top": 0.9, "Width": 0.02, "Height": 0.02}},
+    ]
+
+    crops = crop_faces_from_group(photo, faces)
+    assert len(crops) == 2
+    assert Image.open(io.BytesIO(crops[0])).size == (300, 300)
+    # 30 px padded back-row face is searched too, at Rekognition's minimum size
+    assert Image.open(io.BytesIO(crops[1])).size == (80, 80)
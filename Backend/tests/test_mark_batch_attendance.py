@@ -0,0 +1,108 @@
+import io
+
+import pytest
+from PIL import Image
+
+from core import mark_batch_attendance
+from core.recognizers import Recognizer
+from core.result_cache import recognition_cache
+
+
+class StubRecognizer(Recognizer):
+    """One face per photo, always recognized as the first student."""
+
+    def __init__(self):
+        self.thresholds = []
+
+    def index(self, batch_name, er_number, name, s3_key=None, image_bytes=None):
+        return []
+
+    def detect(self, image_bytes):
+        return [{"BoundingBox": {"Left": 0.1, "Top": 0.1, "Width": 0.8, "Height": 0.8}}]
+
+    def search(self, batch_name, face_bytes, threshold=None):
+        self.thresholds.append(threshold)
+        return {"er_number": "92310133004", "name": "Bhargav Patel"}
+
+
+def _group_photo():
+    buffer = io.BytesIO()
+    Image.new("RGB", (200, 200), "white").save(buffer, format="PNG")
+    buffer.seek(0)
+    return buffer
+
+
+@pytest.fixture
+def reports(s3, monkeypatch):
+    for key in ("ICT_A/92310133004_Bhargav_Patel_1.jpg", "ICT_A/92310133005_Riya_Shah_1.jpg"):
+        s3.put_object(Bucket="ict-attendance", Key=key, Body=b"jpeg")
+    written = []
+
+    def save(present, absent, batch_name, class_name, subject, s3_bucket, region):
+        written.append((class_name, subject, [s["er_number"] for s in present]))
+        return None, f"https://reports/{len(written)}.xlsx"
+
+    monkeypatch.setattr(mark_batch_attendance, "save_attendance_to_excel", save)
+    return written
+
+
+def _run(recognizer, subject="DBMS", threshold=None):
+    return mark_batch_attendance.mark_batch_attendance_collection(
+        "ICT A", "Lab 1", subject, [_group_photo()], recognizer=recognizer, threshold=threshold
+    )
+
+
+def test_threshold_reaches_the_recognizer_and_keys_the_cache(reports):
+    recognizer = StubRecognizer()
+    _run(recognizer, threshold=95)
+    _run(recognizer, threshold=95)
+    _run(recognizer, threshold=70)
+
+    assert recognizer.thresholds == [95, 70]
+
+
+def test_cached_recognition_still_writes_a_new_report(reports):
+    recognizer = StubRecognizer()
+    present, absent, first_url = _run(recognizer, subject="DBMS")
+    hits = recognition_cache.stats()["hits"]
+    again, _, second_url = _run(recognizer, subject="Maths")
+
+    assert recognition_cache.stats()["hits"] == hits + 1
+    assert len(recognizer.thresholds) == 1
+    assert [s["er_number"] for s in again] == [s["er_number"] for s in present] == ["92310133004"]
+    assert [s["er_number"] for s in absent] == ["92310133005"]
+    assert reports == [("Lab 1", "DBMS", ["92310133004"]), ("Lab 1", "Maths", ["92310133004"])]
+    assert first_url != second_url
+
+
+class CrowdRecognizer(StubRecognizer):
+    """Three faces per photo: a roster student (twice) and someone from another batch."""
+
+    def detect(self, image_bytes):
+        return [
+            {"BoundingBox": {"Left": left, "Top": 0.0, "Width": 0.3, "Height": 1.0}}
+            for left in (0.0, 0.35, 0.7)
+        ]
+
+    def search_faces(self, batch_name, face_images, threshold=None):
+        self.thresholds.append(threshold)
+        return [
+            {"er_number": "92310133005", "name": "Riya Shah"},
+            {"er_number": "99999999999", "name": "Visitor"},
+            {"er_number": "92310133005", "name": "Riya Shah"},
+        ][:len(face_images)]
+
+
+def test_collection_mode_searches_faces_not_students(reports):
+    events = []
+    photo = io.BytesIO()
+    Image.new("RGB", (400, 200), "white").save(photo, format="PNG")
+    photo.seek(0)
+
+    present, absent, _ = mark_batch_attendance.mark_batch_attendance_collection(
+        "ICT A", "Lab 1", "DBMS", [photo], recognizer=CrowdRecognizer(), on_progress=events.append
+    )
+
+    assert [s["er_number"] for s in present] == ["92310133005"]
+    assert [s["er_number"] for s in absent] == ["92310133004"]
+    assert [e["event"] for e in events] == ["started", "compared", "present", "compared", "compared"]
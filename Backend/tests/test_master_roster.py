@@ -0,0 +1,33 @@
+import io
+
+import pandas as pd
+
+from core import master_roster
+from core.master_roster import MASTER_STUDENTS_KEY, invalidate_workbook, master_students
+
+
+def _put_roster(s3, names):
+    buffer = io.BytesIO()
+    pd.DataFrame({"Batch": "2023", "Section": "A", "Name": names}).to_excel(buffer, index=False)
+    s3.put_object(Bucket="ict-attendance", Key=MASTER_STUDENTS_KEY, Body=buffer.getvalue())
+
+
+def test_roster_is_parsed_only_when_its_etag_changes(s3, monkeypatch):
+    parsed = []
+    real_summarize = master_roster._summarize_workbook
+    monkeypatch.setattr(master_roster, "_summarize_workbook", lambda body: parsed.append(1) or real_summarize(body))
+
+    _put_roster(s3, ["Asha ", "Bhavin", ""])
+    assert master_students() == {"2023": {"A": ["Asha", "Bhavin"]}}
+    assert master_students() == {"2023": {"A": ["Asha", "Bhavin"]}}
+    assert len(parsed) == 1
+
+    # Revalidation with an unchanged ETag is a 304: nothing is parsed
+    monkeypatch.setattr(master_roster, "ROSTER_REVALIDATE_SECONDS", 0)
+    master_students()
+    assert len(parsed) == 1
+
+    _put_roster(s3, ["Asha", "Bhavin", "Chirag"])
+    invalidate_workbook()
+    assert master_students() == {"2023": {"A": ["Asha", "Bhavin", "Chirag"]}}
+    assert len(parsed) == 2
@@ -0,0 +1,44 @@
+import io
+
+import pandas as pd
+import pytest
+from flask import Flask
+
+from core.overview import build_class_overview
+
+
+def _put_excel(s3, key, frame):
+    buffer = io.BytesIO()
+    frame.to_excel(buffer, index=False)
+    s3.put_object(Bucket="ict-attendance", Key=key, Body=buffer.getvalue())
+
+
+def _report(date, statuses):
+    return pd.DataFrame({
+        "ER Number": [f"9231013300{i}" for i in range(len(statuses))],
+        "Student Name": [f"Student {i}" for i in range(len(statuses))],
+        "Date": date,
+        "Class": "A",
+        "Subject": "OS",
+        "Batch": "2023",
+        "Status": statuses,
+    })
+
+
+@pytest.fixture
+def reports(s3):
+    _put_excel(s3, "students.xlsx", pd.DataFrame({"Name": ["a", "b", "c", "d"]}))
+    _put_excel(s3, "reports/20250801_090000_2023_A_OS.xlsx", _report("01-08-2025", ["Present", "Present", "Absent"]))
+    _put_excel(s3, "reports/20250802_090000_2023_A_OS.xlsx", _report("02-08-2025", ["Present", "Absent", "Absent"]))
+
+
+def test_trend_has_one_entry_per_report_and_month(reports):
+    with Flask(__name__).app_context():
+        data = build_class_overview().get_json()
+
+    assert data["trend"] == [
+        {"month": "Aug", "attendance": 2, "subject_batch": "OS (2023)"},
+        {"month": "Aug", "attendance": 1, "subject_batch": "OS (2023)"},
+    ]
+    (subject,) = data["subjects"]
+    assert (subject["subject"], subject["presentCount"], subject["attendance"]) == ("OS", 3, 37.5)
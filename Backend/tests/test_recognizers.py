@@ -0,0 +1,69 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from core import recognizers
+from core.recognizers import LocalEmbeddingRecognizer, Recognizer, pixel_embedding
+
+
+def whole_image(image_bytes):
+    return [{"BoundingBox": {"Left": 0.0, "Top": 0.0, "Width": 1.0, "Height": 1.0}}]
+
+
+def _photo(seed):
+    pixels = np.random.default_rng(seed).integers(0, 255, (32, 32), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def recognizer(tmp_path):
+    return LocalEmbeddingRecognizer(str(tmp_path / "embeddings"), embed=pixel_embedding, locate=whole_image)
+
+
+def test_recognizer_is_abstract():
+    with pytest.raises(TypeError):
+        Recognizer()
+
+
+def test_local_search_matches_enrolled_students(recognizer):
+    recognizer.index("ICT A", "92310133004", "Bhargav_Patel", image_bytes=_photo(1))
+    recognizer.index("ICT A", "92310133005", "Riya Shah", image_bytes=_photo(2))
+
+    results = recognizer.search_faces("ICT A", [_photo(2), _photo(3), _photo(1)])
+    assert results == [
+        {"er_number": "92310133005", "name": "Riya Shah"},
+        None,
+        {"er_number": "92310133004", "name": "Bhargav Patel"},
+    ]
+
+
+def test_local_matrices_keyed_by_collection_id(recognizer, tmp_path):
+    recognizer.search("B.Tech ICT", _photo(1))   # caches an empty batch
+    recognizer.index("BTech ICT", "92310133004", "Bhargav Patel", image_bytes=_photo(1))
+
+    # Both spellings sanitize to the same collection, so the search sees the new face
+    assert recognizer.search("B.Tech ICT", _photo(1))["er_number"] == "92310133004"
+    assert list(recognizer._matrices) == ["students-BTech_ICT"]
+
+    reloaded = LocalEmbeddingRecognizer(str(tmp_path / "embeddings"), embed=pixel_embedding, locate=whole_image)
+    assert reloaded.search("B.Tech ICT", _photo(1))["name"] == "Bhargav Patel"
+
+
+def test_local_recognizer_without_face_recognition_fails_loudly(monkeypatch, tmp_path):
+    import builtins
+    real_import = builtins.__import__
+
+    def no_face_recognition(name, *args, **kwargs):
+        if name == "face_recognition":
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "__import__", no_face_recognition)
+    with pytest.raises(ImportError, match="face_recognition"):
+        LocalEmbeddingRecognizer(str(tmp_path))
+    with pytest.raises(ImportError):
+        recognizers.get_recognizer("local")
@@ -0,0 +1,40 @@
+import os
+
+from core.reference_cache import ReferenceImageCache
+
+
+def _spill_files(cache):
+    return sorted(os.listdir(cache.spill_dir))
+
+
+def test_spill_file_removed_when_entry_reloaded(tmp_path):
+    cache = ReferenceImageCache(10, str(tmp_path / "spill"))
+    cache.put("a.jpg", "e1", b"aaaaaa")
+    cache.put("b.jpg", "e1", b"bbbbbb")   # evicts a.jpg to disk
+    assert _spill_files(cache) == [os.path.basename(cache._spill_path("a.jpg"))]
+
+    assert cache.get("a.jpg", "e1") == ("e1", b"aaaaaa")
+    # a.jpg is back in memory (b.jpg spilled instead), its own file is gone
+    assert _spill_files(cache) == [os.path.basename(cache._spill_path("b.jpg"))]
+
+
+def test_spill_file_removed_when_overwritten_or_stale(tmp_path):
+    cache = ReferenceImageCache(10, str(tmp_path / "spill"))
+    cache.put("a.jpg", "e1", b"aaaaaa")
+    cache.put("b.jpg", "e1", b"bbbbbb")
+    cache.put("a.jpg", "e2", b"AAAA")     # overwrite with a new version
+    assert not os.path.exists(cache._spill_path("a.jpg"))
+
+    cache.put("c.jpg", "e1", b"cccccc")   # spills b.jpg
+    assert os.path.exists(cache._spill_path("b.jpg"))
+    cache.note_listing("b.jpg", "e9")     # listing shows b.jpg changed
+    assert not os.path.exists(cache._spill_path("b.jpg"))
+    assert cache.get("b.jpg") is None
+
+
+def test_spill_folder_bounded_by_max_bytes(tmp_path):
+    cache = ReferenceImageCache(10, str(tmp_path / "spill"))
+    for i in range(6):
+        cache.put(f"{i}.jpg", "e", b"x" * 6)
+    assert cache._spilled_size <= cache.max_bytes
+    assert len(_spill_files(cache)) == 1
@@ -0,0 +1,36 @@
+from core import report_index
+from core.report_index import refresh_report_index
+from core.report_ingest import iter_report_objects
+
+
+def _listing():
+    return list(iter_report_objects("ict-attendance"))
+
+
+def test_only_new_or_changed_reports_are_parsed(s3, monkeypatch):
+    s3.put_object(Bucket="ict-attendance", Key="reports/a.csv", Body=b"Name\nAsha\nBhavin\n")
+    s3.put_object(Bucket="ict-attendance", Key="reports/b.csv", Body=b"Name\nChirag\n")
+
+    parsed = []
+    real_ingest = report_index.ingest_reports
+
+    def counting_ingest(objects, *args):
+        objects = list(objects)
+        parsed.extend(obj["Key"] for obj in objects)
+        return real_ingest(objects, *args)
+
+    monkeypatch.setattr(report_index, "ingest_reports", counting_ingest)
+
+    index = refresh_report_index(_listing())
+    assert index["reports/a.csv"]["records"] == 2
+    assert index["reports/b.csv"]["students"] == ["Chirag"]
+    assert parsed == ["reports/a.csv", "reports/b.csv"]
+
+    parsed.clear()
+    s3.put_object(Bucket="ict-attendance", Key="reports/b.csv", Body=b"Name\nChirag\nDiya\n")
+    s3.delete_object(Bucket="ict-attendance", Key="reports/a.csv")
+    index = refresh_report_index(_listing())
+
+    assert parsed == ["reports/b.csv"]
+    assert set(index) == {"reports/b.csv"}
+    assert index["reports/b.csv"]["records"] == 2
@@ -0,0 +1,50 @@
+import io
+
+import pandas as pd
+
+from core import report_ingest
+from core.report_ingest import failed_reports, ingest_reports, iter_report_objects
+
+
+def _report_bytes(status="Present"):
+    buffer = io.BytesIO()
+    pd.DataFrame({"ER Number": ["92310133004"], "Date": ["17-10-2026"], "Status": [status]}).to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+def _listing(s3):
+    return list(iter_report_objects("ict-attendance"))
+
+
+def test_unparseable_report_is_not_refetched_until_it_changes(s3, monkeypatch):
+    s3.put_object(Bucket="ict-attendance", Key="reports/a.xlsx", Body=_report_bytes())
+    s3.put_object(Bucket="ict-attendance", Key="reports/b.xlsx", Body=b"not a workbook")
+
+    fetched = []
+    real_fetch = report_ingest._fetch_and_parse
+
+    def counting_fetch(obj, *args):
+        fetched.append(obj["Key"])
+        return real_fetch(obj, *args)
+
+    monkeypatch.setattr(report_ingest, "_fetch_and_parse", counting_fetch)
+
+    assert [obj["Key"] for obj, _ in ingest_reports(_listing(s3))] == ["reports/a.xlsx"]
+    assert list(failed_reports()) == ["reports/b.xlsx"]
+
+    fetched.clear()
+    assert [obj["Key"] for obj, _ in ingest_reports(_listing(s3))] == ["reports/a.xlsx"]
+    assert fetched == ["reports/a.xlsx"]
+
+    # A new upload (new ETag) is tried again
+    s3.put_object(Bucket="ict-attendance", Key="reports/b.xlsx", Body=_report_bytes("Absent"))
+    assert [obj["Key"] for obj, _ in ingest_reports(_listing(s3))] == ["reports/a.xlsx", "reports/b.xlsx"]
+
+
+def test_parse_pool_does_not_fork(monkeypatch):
+    monkeypatch.setattr(report_ingest, "_parse_pool", None)
+    pool = report_ingest._get_parse_pool(2)
+    try:
+        assert pool._mp_context.get_start_method() == "spawn"
+    finally:
+        pool.shutdown()
@@ -0,0 +1,41 @@
+import io
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from core import attendance_rollups, mark_batch_attendance
+from core.report_sidecar import normalize_report_frame, sidecar_key
+
+
+def test_normalize_report_frame_leaves_input_untouched():
+    df = pd.DataFrame({" ER Number ": [92310133004], "Date": ["17-10-2026"], "Status": ["Present"]})
+    typed = normalize_report_frame(df)
+
+    assert list(df.columns) == [" ER Number ", "Date", "Status"]
+    assert df[" ER Number "].dtype == "int64"
+    assert df["Date"].tolist() == ["17-10-2026"]
+    assert typed["ER Number"].tolist() == ["92310133004"]
+    assert str(typed["Status"].dtype) == "category"
+
+
+def test_saved_report_matches_sidecar_and_rollups(s3):
+    present = [{"er_number": "92310133004", "name": "Bhargav Patel"}]
+    absent = [{"er_number": "92310133005", "name": "Riya Shah"}]
+    _, file_url = mark_batch_attendance.save_attendance_to_excel(
+        present, absent, "ICT A", "Lab 1", "DBMS", "ict-attendance", "ap-south-1"
+    )
+    s3_key = "reports/" + file_url.rsplit("/", 1)[1]
+
+    body = s3.get_object(Bucket="ict-attendance", Key=s3_key)["Body"].read()
+    sheet = load_workbook(io.BytesIO(body)).active
+    rows = list(sheet.iter_rows(values_only=True))
+    assert rows[0] == ("ER Number", "Student Name", "Date", "Time", "Class", "Subject", "Batch", "Status")
+    assert [(row[0], row[7]) for row in rows[1:]] == [("92310133004", "Present"), ("92310133005", "Absent")]
+
+    sidecar = s3.get_object(Bucket="ict-attendance", Key=sidecar_key(s3_key))["Body"].read()
+    frame = pd.read_parquet(io.BytesIO(sidecar))
+    assert frame["ER Number"].tolist() == ["92310133004", "92310133005"]
+    assert frame["Status"].tolist() == ["Present", "Absent"]
+
+    (row,) = attendance_rollups.load_rollups()["rows"].values()
+    assert (row["present"], row["absent"]) == (["92310133004"], ["92310133005"])
@@ -0,0 +1,45 @@
+import pytest
+
+from core.reports_service import query_reports
+
+
+@pytest.fixture
+def reports(s3):
+    names = [
+        "20250801_090000_2023_A_OS.csv",
+        "20250802_090000_2023_A_DBMS.csv",
+        "20250803_090000_2023_B_OS.csv",
+        "20250804_090000_2023_A_OS.csv",
+        "20250805_090000_2024_A_OS.csv",
+        "20250806_090000_2023_A_OS.csv",
+    ]
+    for name in names:
+        s3.put_object(Bucket="ict-attendance", Key=f"reports/{name}", Body=b"Name\nAsha\n")
+    return names
+
+
+def _ids(page):
+    return [report["fileName"][:8] for report in page["reports"]]
+
+
+def test_filters_are_served_newest_first(reports):
+    assert _ids(query_reports(batch="2023", section="A", subject="OS")) == ["20250806", "20250804", "20250801"]
+    assert _ids(query_reports(batch="2023", subject="Operating System")) == [
+        "20250806", "20250804", "20250803", "20250801"
+    ]
+    assert _ids(query_reports(subject="OS", date_from="2025-08-03", date_to="2025-08-05")) == [
+        "20250805", "20250804", "20250803"
+    ]
+    assert query_reports(batch="2022")["reports"] == []
+
+
+def test_cursor_pages_through_merged_groups(reports):
+    seen, cursor = [], None
+    while True:
+        page = query_reports(section="A", cursor=cursor, limit=2)
+        seen += _ids(page)
+        cursor = page["nextCursor"]
+        if not cursor:
+            break
+    assert seen == ["20250806", "20250805", "20250804", "20250802", "20250801"]
+    assert "students" not in query_reports(limit=1)["reports"][0]
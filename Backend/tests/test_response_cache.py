@@ -0,0 +1,85 @@
+import pytest
+from flask import Flask
+
+from core import response_cache
+from core.response_cache import cached_response, data_version
+
+
+@pytest.fixture
+def app(s3, monkeypatch):
+    monkeypatch.setattr(response_cache, "DATA_VERSION_TTL_SECONDS", 0)
+    return Flask(__name__)
+
+
+def test_data_version_follows_the_reports_listing(app, s3):
+    empty = data_version()
+    key = "reports/20250801_090000_2023_A_OS.csv"
+    s3.put_object(Bucket="ict-attendance", Key=key, Body=b"Name\n")
+    added = data_version()
+    assert added != empty
+
+    s3.put_object(Bucket="ict-attendance", Key=key, Body=b"Name\nAsha\n")
+    assert data_version() != added
+
+    s3.delete_object(Bucket="ict-attendance", Key=key)
+    assert data_version() == empty
+
+
+def test_downloaded_csv_report_shows_up_without_waiting(s3, monkeypatch):
+    import main
+
+    monkeypatch.setattr(response_cache, "DATA_VERSION_TTL_SECONDS", 3600)
+    client = main.app.test_client()
+    with client.session_transaction() as session:
+        session.update(logged_in=True, recognized_students=["21ICT001_Asha"], batch_name="2023",
+                       class_name="A", subject_name="OS")
+
+    first = client.get("/api/reports")
+    assert first.get_json() == []
+    assert client.get("/download_attendance", headers={"Accept": "application/json"}).get_json()["success"]
+
+    again = client.get("/api/reports", headers={"If-None-Match": first.get_etag()[0]})
+    assert again.status_code == 200
+    assert len(again.get_json()) == 1
+
+
+def test_error_responses_are_not_cached(app):
+    calls = []
+
+    def build():
+        calls.append(1)
+        return "boom", 500
+
+    with app.test_request_context("/dashboard"):
+        assert cached_response("dashboard", build).status_code == 500
+        assert cached_response("dashboard", build).status_code == 500
+    assert len(calls) == 2
+
+
+def test_ok_responses_are_cached_and_revalidated(app):
+    calls = []
+
+    def build():
+        calls.append(1)
+        return "ok"
+
+    with app.test_request_context("/dashboard"):
+        response = cached_response("dashboard", build)
+        etag = response.get_etag()[0]
+    with app.test_request_context("/dashboard"):
+        assert cached_response("dashboard", build).get_data() == b"ok"
+    with app.test_request_context("/dashboard", headers={"If-None-Match": f'"{etag}"'}):
+        assert cached_response("dashboard", build).status_code == 304
+    assert len(calls) == 1
+
+
+def test_dashboard_error_page_is_a_500(monkeypatch):
+    import main
+
+    def fail():
+        raise ValueError("No Excel files found")
+
+    monkeypatch.setattr(main, "generate_overall_attendance", fail)
+    monkeypatch.setattr(main, "render_template", lambda template, **context: context.get("error", ""))
+    body, status = main.render_dashboard()
+    assert (body, status) == ("No Excel files found", 500)
@@ -0,0 +1,39 @@
+import json
+import os
+
+from core import roster_index
+from core.roster_index import add_student_images, load_roster, parse_student_image_key, roster_students
+
+
+def test_parse_student_image_key():
+    assert parse_student_image_key("ICT_A/92310133004_Bhargav_Patel_1.jpg") == ("92310133004", "Bhargav Patel")
+    assert parse_student_image_key("ICT_A/92310133004_Riya.png") == ("92310133004", "Riya")
+
+
+def test_roster_is_built_once_then_served_without_listing(s3, monkeypatch):
+    s3.put_object(Bucket="ict-attendance", Key="ICT_A/92310133004_Bhargav_Patel_1.jpg", Body=b"1")
+    s3.put_object(Bucket="ict-attendance", Key="ICT_A/92310133004_Bhargav_Patel_2.jpg", Body=b"2")
+    s3.put_object(Bucket="ict-attendance", Key="ICT_A/notes.txt", Body=b"")
+
+    roster = load_roster("ICT A")
+    assert roster_students(roster) == [{"er_number": "92310133004", "name": "Bhargav Patel"}]
+    assert len(roster["students"]["92310133004"]["images"]) == 2
+
+    # Persisted to S3 and served from there by a fresh process (no rebuild)
+    stored = json.loads(s3.get_object(Bucket="ict-attendance", Key=roster_index._roster_key("ICT A"))["Body"].read())
+    assert stored["students"].keys() == {"92310133004"}
+    os.remove(roster_index._roster_path("ICT A"))
+    monkeypatch.setattr(roster_index, "_rosters", {})
+    monkeypatch.setattr(roster_index, "rebuild_roster_from_s3", lambda *args: (_ for _ in ()).throw(AssertionError))
+    assert load_roster("ICT A")["students"].keys() == {"92310133004"}
+
+
+def test_new_uploads_update_the_roster_version(s3):
+    version = load_roster("ICT A")["version"]
+    add_student_images("ICT A", "92310133005", "Riya Shah", [
+        {"key": "ICT_A/92310133005_Riya_Shah_1.jpg", "etag": '"e1"', "face_ids": ["f1"]},
+    ])
+
+    roster = load_roster("ICT A")
+    assert roster["version"] == version + 1
+    assert roster["students"]["92310133005"]["face_ids"] == ["f1"]
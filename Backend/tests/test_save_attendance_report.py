@@ -0,0 +1,25 @@
+import os
+
+from core import mark_batch_attendance
+from core.mark_batch_attendance import save_attendance_to_excel
+
+PRESENT = [{"er_number": "92310133004", "name": "Bhargav Patel"}]
+
+
+def test_report_is_uploaded_from_memory(s3):
+    filepath, file_url = save_attendance_to_excel(PRESENT, [], "ICT A", "Lab 1", "DBMS", "ict-attendance", "ap-south-1")
+
+    assert filepath is None
+    assert not os.path.exists(mark_batch_attendance.ATTENDANCE_REPORTS_DIR)
+    key = file_url.split(".amazonaws.com/", 1)[1]
+    assert key.startswith("reports/") and key.endswith("_ICT_A_Lab_1_DBMS.xlsx")
+    assert s3.head_object(Bucket="ict-attendance", Key=key)["ContentLength"] > 0
+
+
+def test_local_copy_only_when_enabled(s3, monkeypatch):
+    monkeypatch.setattr(mark_batch_attendance, "KEEP_LOCAL_REPORTS", True)
+    filepath, file_url = save_attendance_to_excel(PRESENT, [], "ICT A", "Lab 1", "DBMS", "ict-attendance", "ap-south-1")
+
+    key = file_url.split(".amazonaws.com/", 1)[1]
+    with open(filepath, "rb") as f:
+        assert f.read() == s3.get_object(Bucket="ict-attendance", Key=key)["Body"].read()
@@ -0,0 +1,51 @@
+import threading
+
+import pytest
+
+from core.single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_computation():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls, results = [], []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "rendered"
+
+    def caller():
+        results.append(flight.do("dashboard", compute))
+
+    threads = [threading.Thread(target=caller) for _ in range(5)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    while flight.coalesced < 4:
+        pass
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [1]
+    assert results == ["rendered"] * 5
+    assert flight.do("dashboard", lambda: "fresh") == "fresh"   # nothing kept afterwards
+
+
+def test_errors_are_shared_and_waits_time_out():
+    flight = SingleFlight()
+    with pytest.raises(ValueError):
+        flight.do("overview", lambda: (_ for _ in ()).throw(ValueError("boom")))
+
+    release = threading.Event()
+    leader = threading.Thread(target=lambda: flight.do("slow", lambda: release.wait(5)))
+    leader.start()
+    while "slow" not in flight._calls:
+        pass
+    with pytest.raises(TimeoutError):
+        flight.do("slow", lambda: None, timeout=0.05)
+    release.set()
+    leader.join()